@@ -0,0 +1 @@
+../canvas_and_schedule/course_store.py
\ No newline at end of file
@@ -0,0 +1 @@
+../cal_and_dates/watch.py
\ No newline at end of file
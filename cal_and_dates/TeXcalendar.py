@@ -2,13 +2,21 @@
 Tools for creating TeX term calendars.
 """
 from datetime import timedelta
-from pylatex.utils import escape_latex
 
 BEGIN_DOCUMENT = r"\begin{document}"
 END_DOCUMENT = r"\end{document}"
 NEWPAGE = r"\newpage"
 
 
+def escape_latex(text):
+    """
+    pylatex's `escape_latex`.  Imported when first needed, since pylatex
+    takes a while to load.
+    """
+    from pylatex.utils import escape_latex as escape
+    return escape(text)
+
+
 def daterangeIncl(first, last):
     """
     Iterates through days from first to last, inclusive.
@@ -28,21 +36,39 @@ def caltext(day, text, type="caltext"):
         "}{" + escape_latex(text) + "}"
 
 
+def holiday_lines(holidays):
+    """
+    Yields one \\Holiday line for each day of each holiday.
+    """
+    for hday, dates in holidays.items():
+        end = dates["End"] if "End" in dates else dates["Start"]
+        for day in daterangeIncl(dates["Start"], end):
+            yield caltext(day, hday, "Holiday") + '\n'
+
+
 def format_holidays(holidays):
     """
     Takes the holidays info from the YAML data and defines holidays
     for TeX calendar.
     """
 
-    hdayTeX = "\\newcommand*{\\Holidays}{"
-    for hday, dates in holidays.items():
-        if "End" in dates:
-            for day in daterangeIncl(dates["Start"], dates["End"]):
-                hdayTeX += caltext(day, hday, "Holiday") + '\n'
-        else:
-            hdayTeX += caltext(dates["Start"], hday, "Holiday") + '\n'
+    return "\\newcommand*{\\Holidays}{" + "".join(holiday_lines(holidays)) + "}\n"
+
 
-    return hdayTeX + "}\n"
+def write_tex(out, *fragments):
+    """
+    Writes TeX fragments to `out`, separated by newlines.  `out` is anything
+    with a `write` method.  A fragment can be a string, or an iterable of
+    strings, which is written piece by piece.
+    """
+    for i, fragment in enumerate(fragments):
+        if i:
+            out.write("\n")
+        if isinstance(fragment, str):
+            out.write(fragment)
+        else:
+            for piece in fragment:
+                out.write(piece)
 
 
 def get_dates(dates_yaml):
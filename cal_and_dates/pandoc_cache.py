@@ -0,0 +1,122 @@
+"""
+On disk cache for pandoc conversions.  Running pandoc is slow, so the results
+are stored in `CACHEDIR` under a hash of the input text and the conversion
+arguments.  When the cache grows over `MAXSIZE` bytes, least recently used
+entries are removed.  `convert_texts` converts many texts with one pandoc
+run.
+"""
+import hashlib
+import json
+import re
+from os import environ, makedirs, path, remove, scandir, utime
+from watch import write_atomic
+
+CACHEDIR = path.join(environ.get("XDG_CACHE_HOME", path.expanduser("~/.cache")),
+                     "svsu-utils", "pandoc")
+
+MAXSIZE = 50 * 1024 * 1024
+
+
+def cache_key(text, to, format, extra_args):
+    """Hash of everything that affects the output of pandoc."""
+    key = json.dumps([text, to, format, list(extra_args)])
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+
+def evict(maxsize=None):
+    """Removes least recently used entries until the cache fits in `maxsize`."""
+    if maxsize is None:
+        maxsize = MAXSIZE
+    try:
+        entries = [(e.stat().st_mtime, e.stat().st_size, e.path)
+                   for e in scandir(CACHEDIR) if e.name.endswith(".txt")]
+    except FileNotFoundError:
+        return
+
+    total = sum(size for _, size, _ in entries)
+    for _, size, fn in sorted(entries):
+        if total <= maxsize:
+            break
+        try:
+            remove(fn)
+        except FileNotFoundError:
+            pass
+        total -= size
+
+
+def cache_file(text, to, format, extra_args):
+    return path.join(CACHEDIR, cache_key(text, to, format, extra_args) + ".txt")
+
+
+def cached(fn):
+    """The cached result in `fn`, or None."""
+    try:
+        with open(fn, 'r') as f:
+            result = f.read()
+        utime(fn)  # mark as recently used
+        return result
+    except FileNotFoundError:
+        return None
+
+
+def store(fn, result):
+    makedirs(CACHEDIR, exist_ok=True)
+    write_atomic(fn, result)
+
+
+def convert_text(text, to, format=None, extra_args=()):
+    """
+    Same as `pypandoc.convert_text`, but looks in the cache first.
+    """
+    fn = cache_file(text, to, format, extra_args)
+    result = cached(fn)
+    if result is not None:
+        return result
+
+    # Timed by `timing.instrument`, which wraps pypandoc.convert_text
+    import pypandoc
+    result = pypandoc.convert_text(text, to, format=format,
+                                   extra_args=list(extra_args))
+    store(fn, result)
+    evict()
+
+    return result
+
+
+# A paragraph put between texts converted together, and how it comes out
+BREAK = "PANDOCCACHEBREAK"
+BREAK_LINE = re.compile(r'^\s*(?:<p>)?' + BREAK + r'(?:</p>)?\s*$',
+                        re.MULTILINE)
+
+
+def convert_texts(texts, to, format=None, extra_args=()):
+    """
+    Like `convert_text` for a list of texts, returns a list.  The texts that
+    are not in the cache are converted in one pandoc run, separated by a
+    `BREAK` paragraph, and the output is split there.  If it does not split
+    into the right number of parts, they are converted one at a time.
+    """
+    files = [cache_file(text, to, format, extra_args) for text in texts]
+    results = [cached(fn) for fn in files]
+    missing = [i for i, result in enumerate(results) if result is None]
+    if not missing:
+        return results
+
+    import pypandoc
+    joined = pypandoc.convert_text(
+        "\n\n{}\n\n".format(BREAK).join(texts[i] for i in missing),
+        to, format=format, extra_args=list(extra_args))
+    parts = BREAK_LINE.split(joined)
+    if len(parts) != len(missing):
+        parts = [pypandoc.convert_text(texts[i], to, format=format,
+                                       extra_args=list(extra_args))
+                 for i in missing]
+    else:
+        parts = [part.strip('\n') + '\n' for part in parts]
+
+    for i, part in zip(missing, parts):
+        results[i] = part
+        store(files[i], part)
+    evict()
+
+    return results
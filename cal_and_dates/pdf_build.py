@@ -0,0 +1,131 @@
+"""
+Compiles generated TeX documents into PDFs.  A script calls
+`add_arguments(parser)`, collects its documents in a dict from file name
+(without extension) to TeX source, and calls `build(docs, directory, args)`.
+
+Each source is written to `directory` only when it changed, and compiled
+only when its hash (with the TeX command) differs from the last successful
+build recorded in `MANIFEST`.  Documents are compiled at the same time, each
+TeX run in its own process started from a thread pool.  The TeX command can be anything that takes a .tex file name
+and writes the .pdf next to it, for example a stub for testing.
+
+This file lives in `cal_and_dates`; the other directories link to it.
+"""
+import sys
+from os import cpu_count, environ, makedirs, path
+from time import perf_counter
+from watch import write_atomic
+
+# The calendars use fontspec, so they need LuaLaTeX or XeLaTeX
+TEXCOMMAND = environ.get("SVSU_TEX_COMMAND",
+                         "lualatex -interaction=nonstopmode -halt-on-error")
+
+MANIFEST = ".pdf_build.json"
+
+
+def add_arguments(parser, directory=True):
+    """
+    Adds --pdf DIR, or just --pdf if the script already has an output
+    directory, and --tex-command and --tex-jobs.
+    """
+    if directory:
+        parser.add_argument('--pdf', default=None, metavar='DIR',
+                            help="Write each document into DIR and compile "
+                            "it to PDF")
+    else:
+        parser.add_argument('--pdf', action='store_true',
+                            help="Also compile the documents to PDF")
+    parser.add_argument('--tex-command', dest='tex_command',
+                        default=TEXCOMMAND,
+                        help="Command that compiles a .tex file. Defaults "
+                        "to $SVSU_TEX_COMMAND or '{}'.".format(TEXCOMMAND))
+    parser.add_argument('--tex-jobs', dest='tex_jobs', type=int,
+                        default=None,
+                        help="How many documents to compile at the same "
+                        "time. Defaults to the number of CPUs.")
+
+
+def source_hash(tex, command):
+    import hashlib
+    return hashlib.sha1((command + '\0' + tex).encode("utf-8")).hexdigest()
+
+
+def write_if_changed(fn, text):
+    """Writes a file atomically, unless it already has this text."""
+    try:
+        with open(fn, 'r') as f:
+            if f.read() == text:
+                return False
+    except FileNotFoundError:
+        pass
+    write_atomic(fn, text)
+    return True
+
+
+def compile_document(name, directory, command):
+    """Runs the TeX command on one document.  Runs in a worker thread."""
+    import shlex
+    import subprocess
+
+    start = perf_counter()
+    try:
+        res = subprocess.run(shlex.split(command) + [name + '.tex'],
+                             cwd=directory, stdin=subprocess.DEVNULL,
+                             stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                             universal_newlines=True)
+    except (OSError, ValueError) as e:
+        return name, 'not run', perf_counter() - start, \
+            "Cannot run {}: {}".format(command, e)
+    log = '\n'.join(res.stdout.splitlines()[-20:])
+    return name, res.returncode, perf_counter() - start, log
+
+
+def build(docs, directory, args):
+    """
+    Writes and compiles the documents that changed.  Prints a line for each
+    document to stderr.  Returns the number of failed documents.
+    """
+    import json
+
+    makedirs(directory, exist_ok=True)
+    manifest_fn = path.join(directory, MANIFEST)
+    try:
+        with open(manifest_fn, 'r') as f:
+            manifest = json.load(f)
+    except (FileNotFoundError, ValueError):
+        manifest = {}
+
+    todo = {}
+    for name, tex in docs.items():
+        write_if_changed(path.join(directory, name + '.tex'), tex)
+        h = source_hash(tex, args.tex_command)
+        if manifest.get(name) == h and \
+                path.exists(path.join(directory, name + '.pdf')):
+            print("{}: unchanged".format(name), file=sys.stderr)
+        else:
+            todo[name] = h
+
+    failed = 0
+    if todo:
+        # Imported here, so scripts that only might build start fast
+        from concurrent.futures import ThreadPoolExecutor
+
+        with ThreadPoolExecutor(args.tex_jobs or cpu_count()) as pool:
+            futures = [pool.submit(compile_document, name, directory,
+                                   args.tex_command) for name in todo]
+            for future in futures:
+                name, status, seconds, log = future.result()
+                if status == 0:
+                    manifest[name] = todo[name]
+                    print("{}: built in {:.1f} s".format(name, seconds),
+                          file=sys.stderr)
+                else:
+                    manifest.pop(name, None)
+                    failed += 1
+                    print("{}: FAILED ({})\n{}".format(name, status, log),
+                          file=sys.stderr)
+
+        write_atomic(manifest_fn,
+                     json.dumps(manifest, indent=1, sort_keys=True))
+
+    return failed
@@ -2,12 +2,28 @@
 Scraps important semester dates from SVSU registrars calendar webpage
 """
 from datetime import datetime
+from functools import lru_cache
+from os import environ, makedirs, path
+import hashlib
+import json
+import pickle
+import time
 import requests
 import bs4
 import re
 from daterangeparser import parse
+from watch import write_atomic
 
-URL = "https://www.svsu.edu/academicandstudentaffairs/calendar/academiccalendar/"
+URL = environ.get(
+    "SVSU_CALENDAR_URL",
+    "https://www.svsu.edu/academicandstudentaffairs/calendar/academiccalendar/")
+
+# Downloaded pages and parsed semesters are cached here.  A page younger than
+# TTL seconds is used without asking the server; an older one is revalidated
+# with ETag / If-Modified-Since.
+CACHEDIR = path.join(environ.get("XDG_CACHE_HOME", path.expanduser("~/.cache")),
+                     "svsu-utils", "calendar")
+TTL = 24 * 60 * 60
 
 # It seems like this should be as easy as extracting all table rows that have
 # an attribute "headers" with value that is the semester in question, but
@@ -82,6 +98,10 @@ def find_table(page, semester, year):
         semester, year))
 
 
+# The same date strings show up in many rows and many semesters
+parse_dates = lru_cache(maxsize=None)(parse)
+
+
 def parse_row(row):
     data = row.find_all("td")
     if len(data) < 3:
@@ -92,7 +112,7 @@ def parse_row(row):
         dates = data[2].getText().strip()
 
     if dates:
-        dates = parse(dates)
+        dates = parse_dates(dates)
 
     return {'event': event, 'dates': dates}
 
@@ -101,15 +121,116 @@ def match_row(row, semesterreg):
     return len(row.find_all("td", headers=semesterreg)) > 0
 
 
-def get_calendar_table(url, semester, year):
+SEMESTERS = ["Fall", "Winter", "Spring", "Summer"]
+FALL_REGEX = re.compile("FALL\\s{1,}(\\d{4})")
+
+
+def parse_all_semesters(page):
+    """
+    Goes through the whole calendar page once and returns a dict with
+    (semester, year) keys, like ("Winter", 2026), and dicts of events as
+    values.  Only tables are parsed.
+    """
+    strainer = bs4.SoupStrainer("table")
+    calendar_page = bs4.BeautifulSoup(page, "lxml", parse_only=strainer)
+    regs = {sem: re.compile(sem.lower()[1:]) for sem in SEMESTERS}
+
+    semesters = {}
+    for t in calendar_page.find_all("table"):
+        head = t.find("thead")
+        cell = head.find("td") if head is not None else None
+        m = FALL_REGEX.match(cell.getText()) if cell is not None else None
+        body = t.find("tbody")
+        if m is None or body is None:
+            continue
+        fallyear = int(m[1])
+
+        for row in body.find_all("tr"):
+            matching = [sem for sem, reg in regs.items() if match_row(row, reg)]
+            if not matching:
+                continue
+            parsed = parse_row(row)
+            if not parsed['event']:
+                continue
+            for sem in matching:
+                year = fallyear if sem == "Fall" else fallyear + 1
+                semesters.setdefault((sem, year), {})[parsed['event']] = \
+                    parsed['dates']
+
+    return semesters
+
+
+_session = None
+
+
+def session():
+    """One pooled `requests.Session` for all downloads."""
+    global _session
+    if _session is None:
+        _session = requests.Session()
+    return _session
+
+
+def cache_name(url):
+    return path.join(CACHEDIR, hashlib.sha1(url.encode("utf-8")).hexdigest())
+
+
+def fetch_page(url, ttl=None):
+    """
+    Returns the text of the page at `url` and a digest of it, using the
+    cache when possible.
+    """
+    if ttl is None:
+        ttl = TTL
+    fn = cache_name(url)
+    try:
+        with open(fn + ".json", 'r') as f:
+            meta = json.load(f)
+        with open(fn + ".html", 'r') as f:
+            text = f.read()
+    except (FileNotFoundError, ValueError):
+        meta, text = None, None
+
+    if meta is not None and time.time() - meta['fetched'] < ttl:
+        return text, meta['digest']
+
+    headers = {}
+    if meta is not None:
+        if meta.get('etag'):
+            headers['If-None-Match'] = meta['etag']
+        if meta.get('last_modified'):
+            headers['If-Modified-Since'] = meta['last_modified']
+
+    res = session().get(url, headers=headers)
+    makedirs(CACHEDIR, exist_ok=True)
+    if res.status_code == 304 and meta is not None:
+        meta['fetched'] = time.time()
+        write_atomic(fn + ".json", json.dumps(meta))
+        return text, meta['digest']
+
+    res.raise_for_status()
+    text = res.text
+    meta = {
+        'fetched': time.time(),
+        'etag': res.headers.get('ETag'),
+        'last_modified': res.headers.get('Last-Modified'),
+        'digest': hashlib.sha1(text.encode("utf-8")).hexdigest(),
+    }
+    write_atomic(fn + ".html", text)
+    write_atomic(fn + ".json", json.dumps(meta))
+
+    return text, meta['digest']
+
+
+def get_calendar_table(url, semester, year, page=None):
     """
     Scraps calendar info from the given url.  You can pass a function that
     fixes bad date ranges.
     """
 
-    res = requests.get(url)
-    res.raise_for_status()
-    calendar_page = bs4.BeautifulSoup(res.text, "lxml")
+    if page is None:
+        page, _ = fetch_page(url)
+    calendar_page = bs4.BeautifulSoup(page, "lxml")
 
     body = find_table(calendar_page, semester, year)
 
@@ -119,15 +240,44 @@ def get_calendar_table(url, semester, year):
             if match_row(row, semesterreg)]
 
 
+_semesters = {}
+
+
+def get_all_semesters():
+    """
+    Data on every semester of every academic year on the calendar page,
+    see `parse_all_semesters`.  Results are cached in memory and on disk for
+    as long as the page does not change.
+    """
+    page, digest = fetch_page(URL)
+    if digest in _semesters:
+        return _semesters[digest]
+
+    fn = path.join(CACHEDIR, "semesters-{}.pickle".format(digest))
+    try:
+        with open(fn, 'rb') as f:
+            data = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError):
+        data = parse_all_semesters(page)
+        write_atomic(fn, pickle.dumps(data))
+
+    _semesters[digest] = data
+    return data
+
+
 def get_semester_data(semester, year=None):
     """Gets data on a single semester"""
 
     if year is None:
         year = datetime.now().year
 
-    rows = get_calendar_table(URL, semester, year)
+    key = (semester.capitalize(), year)
+    semesters = get_all_semesters()
+    if key not in semesters:
+        raise RuntimeError("Could not find a calendar table for {} {}".format(
+            semester, year))
 
-    return {row['event']: row['dates'] for row in rows if row['event']}
+    return semesters[key]
 
 # A convenience function for printing:
 
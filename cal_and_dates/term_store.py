@@ -0,0 +1,240 @@
+"""
+Local store of semester dates scraped by `svsu_calendar`, for all years.
+
+Terms are kept in an SQLite database at `DBFILE`.  Each term has its dates
+from the calendar page and a bitset of its class days: bit i is set when the
+day `first + i` (a day ordinal) is a weekday between "Classes Begin" and
+"Classes End" that is not a holiday.  A loaded `Term` answers
+
+    term.is_class_day(day)          constant time
+    term.nth_meeting("TR", n)       constant time after the first call
+    holidays_between(db, a, b)      one indexed query
+
+without scraping the page or parsing any YAML.  Holidays are all events except
+`NOT_HOLIDAYS`, same as in the holidays.yaml files.
+"""
+import sqlite3
+from datetime import date, datetime
+from functools import lru_cache
+from os import environ, makedirs, path
+
+DBFILE = path.join(environ.get("XDG_DATA_HOME",
+                               path.expanduser("~/.local/share")),
+                   "svsu-utils", "terms.sqlite")
+
+NOT_HOLIDAYS = ["Classes Begin", "Classes End", "Commencement",
+                "Classes Resume"]
+
+# Weekday offsets from Monday, same letters as TeXcalendar.DAYS
+WEEKDAYS = {'M': 0, 'T': 1, 'W': 2, 'R': 3, 'F': 4}
+
+
+def pattern_offsets(pattern):
+    """Sorted weekday offsets for a day pattern like "MWF" or "TR"."""
+    try:
+        return sorted({WEEKDAYS[c] for c in pattern})
+    except KeyError as e:
+        raise ValueError("Unknown day {} in pattern {}".format(e, pattern))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS terms (
+    semester TEXT NOT NULL,
+    year INTEGER NOT NULL,
+    first INTEGER NOT NULL,
+    last INTEGER NOT NULL,
+    classdays BLOB NOT NULL,
+    PRIMARY KEY (semester, year)
+);
+CREATE TABLE IF NOT EXISTS events (
+    semester TEXT NOT NULL,
+    year INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    start INTEGER NOT NULL,
+    end INTEGER,
+    holiday INTEGER NOT NULL,
+    PRIMARY KEY (semester, year, name)
+);
+CREATE INDEX IF NOT EXISTS events_start ON events (holiday, start);
+"""
+
+
+def connect(fn=None):
+    """Opens the store, creating it if needed."""
+    if fn is None:
+        fn = DBFILE
+    if fn != ":memory:":
+        makedirs(path.dirname(fn), exist_ok=True)
+    db = sqlite3.connect(fn)
+    db.executescript(SCHEMA)
+    return db
+
+
+def ordinal(day):
+    """Day ordinal of a date, datetime or arrow object."""
+    return day.toordinal()
+
+
+def classday_bits(first, last, holidays):
+    """
+    Bitset of class days from ordinal `first` to `last`.  `holidays` is a
+    list of (start, end) ordinals, end inclusive.
+    """
+    bits = 0
+    for i in range(last - first + 1):
+        if date.fromordinal(first + i).weekday() < 5:
+            bits |= 1 << i
+    for start, end in holidays:
+        for o in range(max(start, first), min(end, last) + 1):
+            bits &= ~(1 << (o - first))
+    return bits
+
+
+def to_blob(bits):
+    return bits.to_bytes((bits.bit_length() + 7) // 8, 'little')
+
+
+def from_blob(blob):
+    return int.from_bytes(blob, 'little')
+
+
+def store_semester(db, semester, year, data):
+    """
+    Stores one semester, as returned by `svsu_calendar.get_semester_data`,
+    replacing what was stored for it before.
+    """
+    semester = semester.capitalize()
+    events = []
+    for name, dates in data.items():
+        if not dates:
+            continue
+        start = ordinal(dates[0])
+        end = ordinal(dates[1]) if dates[1] is not None else None
+        events.append((semester, year, name, start, end,
+                       int(name not in NOT_HOLIDAYS)))
+
+    first = ordinal(data["Classes Begin"][0])
+    last = ordinal(data["Classes End"][0])
+    holidays = [(start, end or start) for *_, start, end, h in events if h]
+
+    with db:
+        db.execute("DELETE FROM events WHERE semester = ? AND year = ?",
+                   (semester, year))
+        db.executemany("INSERT INTO events VALUES (?, ?, ?, ?, ?, ?)", events)
+        db.execute("INSERT OR REPLACE INTO terms VALUES (?, ?, ?, ?, ?)",
+                   (semester, year, first, last,
+                    to_blob(classday_bits(first, last, holidays))))
+    load_term.cache_clear()
+
+
+def update(db, semesters):
+    """
+    Stores all semesters from `svsu_calendar.get_all_semesters`.  Semesters
+    without class begin and end dates are skipped.  Returns the stored keys.
+    """
+    stored = []
+    for (semester, year), data in sorted(semesters.items()):
+        if not data.get("Classes Begin") or not data.get("Classes End"):
+            continue
+        store_semester(db, semester, year, data)
+        stored.append((semester, year))
+    return stored
+
+
+def terms(db):
+    """List of (semester, year) of the stored terms, by start date."""
+    return db.execute("SELECT semester, year FROM terms ORDER BY first").fetchall()
+
+
+def semester_data(db, semester, year):
+    """
+    Events of a stored semester, in the same form as
+    `svsu_calendar.get_semester_data`, or None if it is not stored.
+    """
+    rows = db.execute("SELECT name, start, end FROM events "
+                      "WHERE semester = ? AND year = ?",
+                      (semester.capitalize(), year)).fetchall()
+    if not rows:
+        return None
+
+    return {name: (datetime.fromordinal(start),
+                   datetime.fromordinal(end) if end is not None else None)
+            for name, start, end in rows}
+
+
+class Term:
+    """Class days of one term, see the module docstring."""
+
+    def __init__(self, semester, year, first, last, bits):
+        self.semester = semester
+        self.year = year
+        self.first = first
+        self.last = last
+        self.bits = bits
+        self._meetings = {}
+
+    def is_class_day(self, day):
+        o = ordinal(day)
+        if o < self.first or o > self.last:
+            return False
+        return bool(self.bits >> (o - self.first) & 1)
+
+    def meetings(self, pattern):
+        """Ordinals of all class meetings for a day pattern like "TR"."""
+        if pattern not in self._meetings:
+            days = set(pattern_offsets(pattern))
+            self._meetings[pattern] = [
+                o for o in range(self.first, self.last + 1)
+                if self.bits >> (o - self.first) & 1
+                and date.fromordinal(o).weekday() in days]
+        return self._meetings[pattern]
+
+    def nth_meeting(self, pattern, n):
+        """Date of the n-th class meeting, counted from 1, for a day
+        pattern.  Raises IndexError if the term has fewer meetings."""
+        if n < 1:
+            raise IndexError("Meetings are counted from 1")
+        return date.fromordinal(self.meetings(pattern)[n - 1])
+
+
+@lru_cache(maxsize=None)
+def load_term(db, semester, year):
+    """The `Term` for a semester, or None if it is not stored."""
+    semester = semester.capitalize()
+    row = db.execute("SELECT first, last, classdays FROM terms "
+                     "WHERE semester = ? AND year = ?",
+                     (semester, year)).fetchone()
+    if row is None:
+        return None
+    first, last, blob = row
+    return Term(semester, year, first, last, from_blob(blob))
+
+
+def term_of(db, day):
+    """The `Term` whose classes run on `day`, or None."""
+    o = ordinal(day)
+    row = db.execute("SELECT semester, year FROM terms "
+                     "WHERE first <= ? AND last >= ? ORDER BY first DESC",
+                     (o, o)).fetchone()
+    if row is None:
+        return None
+    return load_term(db, *row)
+
+
+def holidays_between(db, first, last):
+    """
+    Holidays that overlap the days from `first` to `last`, inclusive, as a
+    list of (name, start date, end date or None, semester, year).
+    """
+    # A holiday that overlaps starts at most the longest holiday before
+    # `first`, so a range on the start column is enough to use the index.
+    longest, = db.execute("SELECT coalesce(max(coalesce(end, start) - start), 0) "
+                          "FROM events WHERE holiday = 1").fetchone()
+    rows = db.execute("SELECT name, start, end, semester, year FROM events "
+                      "WHERE holiday = 1 AND start BETWEEN ? AND ? "
+                      "AND coalesce(end, start) >= ? ORDER BY start",
+                      (ordinal(first) - longest, ordinal(last),
+                       ordinal(first))).fetchall()
+    return [(name, date.fromordinal(start),
+             date.fromordinal(end) if end is not None else None,
+             semester, year)
+            for name, start, end, semester, year in rows]
@@ -0,0 +1,185 @@
+"""
+Timing instrumentation shared by the scripts.  A script calls
+`add_arguments(parser)` and, after parsing, `setup(args)`.  That gives it
+
+    --timing        print time per phase and per external call to stderr
+    --trace FILE    also write all timings to FILE, in the Chrome trace
+                    format (open in chrome://tracing or Perfetto)
+    --profile       also run cProfile and print the top functions
+
+Phases are marked with `with phase("name"):`.  HTTP requests, WebDriver
+commands and pandoc conversions are timed automatically.  When none of the
+options is given, nothing is recorded, nothing extra is imported, and
+`phase` costs next to nothing.
+
+This file lives in `cal_and_dates`; the other directories link to it.
+"""
+import atexit
+import json
+import sys
+import threading
+from contextlib import contextmanager
+from functools import wraps
+from os import getpid
+from time import perf_counter
+
+ENABLED = False
+EVENTS = []
+_t0 = perf_counter()
+_lock = threading.Lock()
+
+
+def add_arguments(parser):
+    parser.add_argument('--timing', action='store_true',
+                        help="Print time spent in each phase to stderr")
+    parser.add_argument('--trace', default=None, metavar='FILE',
+                        help="Write a JSON trace of all phases and external "
+                        "calls to FILE")
+    parser.add_argument('--profile', action='store_true',
+                        help="Run under cProfile and print the top functions "
+                        "to stderr")
+
+
+def record(kind, name, start, end):
+    with _lock:
+        EVENTS.append({'kind': kind, 'name': name, 'start': start - _t0,
+                       'duration': end - start,
+                       'thread': threading.get_ident()})
+
+
+@contextmanager
+def phase(name, kind='phase'):
+    """Records how long the enclosed block takes."""
+    if not ENABLED:
+        yield
+        return
+    start = perf_counter()
+    try:
+        yield
+    finally:
+        record(kind, name, start, perf_counter())
+
+
+def timed(kind, name=None):
+    """Decorator version of `phase`, for external calls."""
+    def decorator(fn):
+        label = name or fn.__qualname__
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with phase(label, kind):
+                return fn(*args, **kwargs)
+        wrapper.__timed__ = True
+        return wrapper
+    return decorator
+
+
+def patch(owner, attr, kind, name=None):
+    fn = getattr(owner, attr)
+    if not getattr(fn, '__timed__', False):
+        setattr(owner, attr, timed(kind, name or attr)(fn))
+
+
+def installed(module):
+    """Imports a module if it is installed.  Only used when timing is on,
+    so the import time does not matter."""
+    try:
+        __import__(module)
+        return True
+    except ImportError:
+        return False
+
+
+def instrument():
+    """Wraps the external calls of the installed libraries."""
+    if installed('requests'):
+        import requests
+
+        original = requests.Session.request
+
+        @wraps(original)
+        def request(self, method, url, *args, **kwargs):
+            with phase('{} {}'.format(method, url.split('?')[0]), 'http'):
+                return original(self, method, url, *args, **kwargs)
+        if not getattr(original, '__timed__', False):
+            request.__timed__ = True
+            requests.Session.request = request
+
+    if installed('selenium.webdriver'):
+        from selenium.webdriver.remote.webdriver import WebDriver
+
+        original_execute = WebDriver.execute
+
+        @wraps(original_execute)
+        def execute(self, driver_command, *args, **kwargs):
+            with phase(driver_command, 'webdriver'):
+                return original_execute(self, driver_command, *args, **kwargs)
+        if not getattr(original_execute, '__timed__', False):
+            execute.__timed__ = True
+            WebDriver.execute = execute
+
+    if installed('pypandoc'):
+        import pypandoc
+        patch(pypandoc, 'convert_text', 'pandoc')
+        patch(pypandoc, 'convert_file', 'pandoc')
+
+
+def summary():
+    """Totals per kind and name, slowest first."""
+    totals = {}
+    for e in EVENTS:
+        count, total = totals.get((e['kind'], e['name']), (0, 0.0))
+        totals[e['kind'], e['name']] = (count + 1, total + e['duration'])
+
+    return sorted(((kind, name, count, total)
+                   for (kind, name), (count, total) in totals.items()),
+                  key=lambda t: -t[3])
+
+
+def print_summary(file=None):
+    if file is None:
+        file = sys.stderr
+    print('{:<10} {:<40} {:>6} {:>10}'.format('kind', 'name', 'calls',
+                                              'seconds'), file=file)
+    for kind, name, count, total in summary():
+        print('{:<10} {:<40} {:>6} {:10.3f}'.format(kind, name[:40], count,
+                                                    total), file=file)
+    print('{:<10} {:<40} {:>6} {:10.3f}'.format('total', '', '',
+                                                perf_counter() - _t0),
+          file=file)
+
+
+def write_trace(fn):
+    pid = getpid()
+    events = [{'name': e['name'], 'cat': e['kind'], 'ph': 'X', 'pid': pid,
+               'tid': e['thread'], 'ts': round(e['start'] * 1e6),
+               'dur': round(e['duration'] * 1e6)} for e in EVENTS]
+    with open(fn, 'w') as f:
+        json.dump({'traceEvents': events}, f)
+
+
+def setup(args):
+    """Turns on whatever the command line options ask for."""
+    global ENABLED
+    if not (args.timing or args.trace or args.profile):
+        return
+    ENABLED = True
+    instrument()
+
+    profiler = None
+    if args.profile:
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+
+    def finish():
+        if profiler is not None:
+            import pstats
+            profiler.disable()
+            pstats.Stats(profiler, stream=sys.stderr).sort_stats(
+                'cumulative').print_stats(30)
+        if args.trace:
+            write_trace(args.trace)
+        print_summary()
+
+    atexit.register(finish)
@@ -0,0 +1,76 @@
+"""
+Watching files for changes, for the --watch modes of the scripts.  Uses
+inotify through `inotify_simple` when it is installed, and polls the
+modification times otherwise.
+
+This file lives in `cal_and_dates`; the other directories link to it.
+"""
+from importlib.util import find_spec
+from os import path, replace, stat
+from time import sleep
+
+
+def write_atomic(fn, data):
+    """Writes a file so that readers never see it half written.  `data` is
+    text, or bytes for a binary file."""
+    with open(fn + ".tmp", 'wb' if isinstance(data, bytes) else 'w') as f:
+        f.write(data)
+    replace(fn + ".tmp", fn)
+
+
+def mtimes(files):
+    stamps = {}
+    for fn in files:
+        try:
+            stamps[fn] = stat(fn).st_mtime_ns
+        except FileNotFoundError:
+            stamps[fn] = None
+    return stamps
+
+
+def poll_changes(files, interval):
+    old = mtimes(files)
+    while True:
+        sleep(interval)
+        new = mtimes(files)
+        changed = {fn for fn in files if new[fn] != old[fn]}
+        old = new
+        if changed:
+            yield changed
+
+
+def inotify_changes(files, settle):
+    from inotify_simple import INotify, flags
+
+    # Editors often replace a file instead of writing it, so watch the
+    # directories and pick out our files by name.
+    inotify = INotify()
+    mask = flags.CLOSE_WRITE | flags.MOVED_TO | flags.CREATE
+    watches = {}
+    for fn in files:
+        directory = path.dirname(fn)
+        if directory not in watches.values():
+            watches[inotify.add_watch(directory, mask)] = directory
+
+    while True:
+        events = inotify.read()
+        # Wait for a burst of events to settle
+        more = inotify.read(timeout=int(settle * 1000))
+        while more:
+            events += more
+            more = inotify.read(timeout=int(settle * 1000))
+        changed = {path.join(watches[e.wd], e.name) for e in events} & files
+        if changed:
+            yield changed
+
+
+def changes(files, interval=0.5):
+    """
+    Generator that yields the set of changed files each time some of
+    `files` change.  It never ends.
+    """
+    files = {path.abspath(fn) for fn in files}
+    if find_spec('inotify_simple') is None:
+        return poll_changes(files, interval)
+
+    return inotify_changes(files, interval / 5)
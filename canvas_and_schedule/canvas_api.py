@@ -0,0 +1,212 @@
+"""
+Minimal direct access to the Canvas REST API, for the things the `canvas`
+module does not do: updating and deleting events, posting an announcement
+to many sections without converting it for each one, reading rosters a
+page at a time, and running many requests over one pooled connection within
+the rate limit.
+
+The API location can be changed with the `CANVAS_API_URL` environment
+variable, for example to point at a local test server.  The access token is
+taken from `CANVAS_TOKEN`, or from `canvas.read_access_token()` if that
+returns it.  Without a token, the scripts stop with a message instead of
+sending requests Canvas would refuse.
+"""
+import sys
+import threading
+import time
+from os import environ
+import requests
+from requests.adapters import HTTPAdapter
+
+APIURL = environ.get("CANVAS_API_URL", "https://canvas.svsu.edu/api/v1")
+
+
+def access_token():
+    """Canvas access token.  Exits with a message if it cannot be found."""
+    token = environ.get("CANVAS_TOKEN")
+    if token:
+        return token
+
+    import canvas
+    token = canvas.read_access_token()
+    if isinstance(token, str) and token:
+        return token
+
+    sys.exit("No Canvas access token found.  Set the CANVAS_TOKEN "
+             "environment variable to your Canvas access token.")
+
+
+def session(token=None, pool=10):
+    """
+    A `requests.Session` with the authorization header set, and a connection
+    pool big enough for `pool` threads.
+    """
+    if token is None:
+        token = access_token()
+    s = requests.Session()
+    s.headers['Authorization'] = 'Bearer ' + token
+    adapter = HTTPAdapter(pool_connections=pool, pool_maxsize=pool)
+    s.mount('http://', adapter)
+    s.mount('https://', adapter)
+    return s
+
+
+def url(endpoint):
+    """Full URL of an endpoint.  Full URLs, like the next page links Canvas
+    sends, are left alone."""
+    if endpoint.startswith(('http://', 'https://')):
+        return endpoint
+    return APIURL.rstrip('/') + '/' + endpoint.lstrip('/')
+
+
+class Throttle:
+    """
+    Limits how many requests run at once, following Canvas's rate limit.
+    Canvas reports what is left of its request budget in the
+    X-Rate-Limit-Remaining header, and answers 403 "Rate Limit Exceeded" (or
+    429) when it is used up.  The limit is cut when the budget gets low or a
+    request is throttled, and grows back by one as long as it is high.
+    """
+    LOW = 300
+    CRITICAL = 100
+
+    def __init__(self, jobs):
+        self.jobs = jobs
+        self.limit = jobs
+        self.active = 0
+        self.lock = threading.Condition()
+
+    def __enter__(self):
+        with self.lock:
+            while self.active >= self.limit:
+                self.lock.wait()
+            self.active += 1
+        return self
+
+    def __exit__(self, *exc):
+        with self.lock:
+            self.active -= 1
+            self.lock.notify_all()
+
+    def update(self, res):
+        """Adjusts the limit after a response."""
+        throttled = is_throttled(res)
+        try:
+            remaining = float(res.headers['X-Rate-Limit-Remaining'])
+        except (KeyError, ValueError):
+            remaining = None
+        with self.lock:
+            if throttled or (remaining is not None
+                             and remaining < self.CRITICAL):
+                self.limit = 1
+            elif remaining is not None and remaining < self.LOW:
+                self.limit = max(1, self.limit // 2)
+            elif self.limit < self.jobs:
+                self.limit += 1
+            self.lock.notify_all()
+
+
+# Server errors worth trying again.  A POST may have been carried out even
+# when Canvas answers with an error, so it is only sent again when it was
+# throttled, or when Canvas says with 503 and Retry-After that it did not
+# take it.
+RETRY_STATUS = (500, 502, 503, 504)
+IDEMPOTENT = ('GET', 'HEAD', 'PUT', 'DELETE', 'OPTIONS')
+
+
+def is_throttled(res):
+    return res.status_code == 429 or (res.status_code == 403 and
+                                      'Rate Limit Exceeded' in res.text)
+
+
+def should_retry(method, res):
+    if is_throttled(res):
+        return True
+    if method.upper() in IDEMPOTENT:
+        return res.status_code in RETRY_STATUS
+    return res.status_code == 503 and 'Retry-After' in res.headers
+
+
+def request(s, method, endpoint, throttle=None, retries=5, backoff=0.5,
+            **kwargs):
+    """
+    Sends a request, retrying with exponential backoff when Canvas throttles
+    it or has a server error, see `should_retry`.  Returns the response and
+    the number of retries.
+    """
+    for attempt in range(retries + 1):
+        if throttle is None:
+            res = s.request(method, url(endpoint), **kwargs)
+        else:
+            with throttle:
+                res = s.request(method, url(endpoint), **kwargs)
+            throttle.update(res)
+        if not should_retry(method, res) or attempt == retries:
+            break
+        try:
+            delay = float(res.headers['Retry-After'])
+        except (KeyError, ValueError):
+            delay = backoff * 2 ** attempt
+        time.sleep(delay)
+
+    res.raise_for_status()
+    return res, attempt
+
+
+def pages(s, endpoint, throttle=None, params=None):
+    """
+    Yields the JSON of each page of a list, following the "next" links in
+    the Link header.
+    """
+    res, _ = request(s, 'GET', endpoint, throttle, params=params)
+    yield res.json()
+    while 'next' in res.links:
+        res, _ = request(s, 'GET', res.links['next']['url'], throttle)
+        yield res.json()
+
+
+def get_students(s, classid, throttle=None, per_page=100):
+    """Yields the students of a course a page at a time, as lists of
+    dicts."""
+    return pages(s, 'courses/{}/users'.format(classid), throttle,
+                 params={'enrollment_type[]': 'student',
+                         'include[]': 'email', 'per_page': per_page})
+
+
+def post_announcement(s, classid, title, html, throttle=None):
+    """
+    Posts an announcement with an HTML body to a course.  Returns the
+    response JSON and the number of retries.
+    """
+    res, retries = request(s, 'POST',
+                           'courses/{}/discussion_topics'.format(classid),
+                           throttle,
+                           data={'title': title, 'message': html,
+                                 'is_announcement': 'true'})
+    return res.json(), retries
+
+
+def create_event(s, classid, event, throttle=None):
+    """Creates a calendar event in a course, returns its id."""
+    data = {'calendar_event[context_code]': 'course_{}'.format(classid)}
+    data.update({'calendar_event[{}]'.format(k): v for k, v in event.items()})
+    res, _ = request(s, 'POST', 'calendar_events', throttle, data=data)
+    return res.json()['id']
+
+
+def update_event(s, eventid, event, throttle=None):
+    """Changes an existing calendar event."""
+    data = {'calendar_event[{}]'.format(k): v for k, v in event.items()}
+    request(s, 'PUT', 'calendar_events/{}'.format(eventid), throttle,
+            data=data)
+    return eventid
+
+
+def delete_event(s, eventid, throttle=None):
+    """Deletes a calendar event.  Events that are already gone are fine."""
+    try:
+        request(s, 'DELETE', 'calendar_events/{}'.format(eventid), throttle)
+    except requests.HTTPError as e:
+        if e.response is None or e.response.status_code != 404:
+            raise
+    return eventid
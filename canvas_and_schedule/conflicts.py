@@ -0,0 +1,137 @@
+"""
+Finds scheduling conflicts in a list of sections: classes that overlap in the
+same room, classes of the same instructor that overlap, and final exams that
+land in the same slot for the same room or instructor.
+
+Sections are dicts like the ones from `svsu_get_schedule`:
+
+    {'caption': ..., 'instructor': ..., 'loc': ..., 'days': ['M', 'W'],
+     'start': '10:30', 'end': '12:20'}
+
+`days` can also be a pattern string like "MWF" or "TR".  Sections without
+times (for example from `course_list.parse_course`) are ignored.  A
+team-taught section is listed once per instructor; it counts as one section
+for rooms, and is never in conflict with itself.
+"""
+from collections import defaultdict
+from final_exams import find_times
+
+# Locations that are not real rooms
+NOT_ROOMS = ['TBA', 'Online', 'ONLINE', 'To Be Announced']
+
+
+def day_letters(days):
+    """Day pattern string, with Th written as R."""
+    if isinstance(days, str):
+        return days
+    return ''.join('R' if day == 'Th' else day for day in days)
+
+
+def minutes(time):
+    h, m = time.split(':')
+    return 60 * int(h) + int(m)
+
+
+def is_room(loc):
+    return bool(loc) and not any(word in loc for word in NOT_ROOMS)
+
+
+def section_key(s):
+    """What makes two listed sections the same section."""
+    return (s.get('caption'), day_letters(s['days']), s.get('start'),
+            s.get('loc'))
+
+
+def overlaps(intervals):
+    """
+    Takes a list of (start, end, index) and yields pairs of indices of
+    overlapping intervals, with the overlap, using a sweep over sorted starts.
+    """
+    active = []
+    for start, end, i in sorted(intervals):
+        active = [a for a in active if a[0] > start]
+        for a_end, j in active:
+            yield j, i, start, min(end, a_end)
+        active.append((end, i))
+
+
+def class_conflicts(sections, field):
+    """
+    Overlapping classes that share `field` ('loc' or 'instructor').
+    """
+    groups = defaultdict(list)
+    seen = set()
+    for i, s in enumerate(sections):
+        key = s.get(field)
+        if not key or (field == 'loc' and not is_room(key)):
+            continue
+        # Once per section, and per instructor for instructor conflicts
+        if (section_key(s), key) in seen:
+            continue
+        seen.add((section_key(s), key))
+        for day in day_letters(s['days']):
+            groups[key, day].append((minutes(s['start']), minutes(s['end']), i))
+
+    found = []
+    for (key, day), intervals in sorted(groups.items()):
+        for i, j, start, end in overlaps(intervals):
+            if section_key(sections[i]) == section_key(sections[j]):
+                continue
+            found.append({
+                'type': 'room' if field == 'loc' else 'instructor',
+                field: key,
+                'day': day,
+                'sections': [sections[i].get('caption'),
+                             sections[j].get('caption')],
+                'overlap': ['{}:{:02}'.format(*divmod(start, 60)),
+                            '{}:{:02}'.format(*divmod(end, 60))],
+            })
+
+    return found
+
+
+def exam_conflicts(sections, year=None):
+    """
+    Sections whose final exams land in the same slot for the same room or
+    instructor.  Also returns sections that have no slot in the table.
+    """
+    exams, _ = find_times(((day_letters(s['days']), s['start'])
+                           for s in sections), year=year)
+
+    groups = defaultdict(dict)
+    missing = []
+    for s, (day, slot) in zip(sections, exams):
+        if day is None:
+            if s.get('caption') not in missing:
+                missing.append(s.get('caption'))
+            continue
+        # Dicts from section keys to captions, so each section counts once
+        if is_room(s.get('loc')):
+            groups['loc', s['loc'], day, slot][section_key(s)] = \
+                s.get('caption')
+        if s.get('instructor'):
+            groups['instructor', s['instructor'], day, slot][
+                section_key(s)] = s.get('caption')
+
+    found = [{'type': 'final_exam', field: key, 'day': day, 'slot': slot,
+              'sections': list(captions.values())}
+             for (field, key, day, slot), captions in sorted(groups.items())
+             if len(captions) > 1]
+
+    return found, missing
+
+
+def find_conflicts(sections, year=None):
+    """
+    Report of all conflicts, as a dict that can be dumped to JSON.
+    """
+    sections = [s for s in sections if s.get('start') and s.get('end')]
+    exams, missing = exam_conflicts(sections, year)
+
+    return {
+        'sections': len({section_key(s) for s in sections}),
+        'room': class_conflicts(sections, 'loc'),
+        'instructor': class_conflicts(sections, 'instructor'),
+        'final_exam': exams,
+        'no_final_exam_slot': missing,
+    }
@@ -3,20 +3,30 @@ Module for searching on SVSU Course Schedule website
 """
 import bs4
 import re
+from warnings import warn
 from selenium import webdriver
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.support.ui import Select
-from time import sleep
+from selenium.webdriver.support.wait import WebDriverWait
 
+SEARCHURL = "https://webtech.svsu.edu/courses/#!/home#top"
 
-def enter_selection(driver, id, regexp):
+COURSE_RE = re.compile(r"^([^*]*)\*([^*]*)\*([^(]*)\((\d*)\)\s*(.*)$")
+
+def enter_selection(driver, id, regexp, timeout=10):
     """
-    Search drop-down menu options for a regexp and select the first match
+    Search drop-down menu options for a regexp and select the first match.
+    Waits for a matching option to show up.
     """
-    element = driver.find_element_by_id(id)
-    choice = next(s for s in element.text.split("\n") if regexp.search(s))
-    selector = Select(element)
-    selector.select_by_visible_text(choice)
-    sleep(1)
+    def choice(d):
+        element = d.find_element(By.ID, id)
+        return next((s for s in element.text.split("\n") if regexp.search(s)),
+                    None)
+
+    selector = Select(driver.find_element(By.ID, id))
+    selector.select_by_visible_text(WebDriverWait(driver, timeout).until(choice))
 
 
 def parse_course(course):
@@ -24,8 +34,7 @@ def parse_course(course):
     Extract interesting information from a single course listing, and build
     a dictionary from it.
     """
-    course_re = r"^([^*]*)\*([^*]*)\*([^(]*)\((\d*)\)\s*(.*)$"
-    m = re.match(course_re, course[0])
+    m = COURSE_RE.match(course[0])
     return {'dept': m[1],
             'number': m[2],
             'section': m[3],
@@ -35,34 +44,84 @@ def parse_course(course):
             }
 
 
-def get_course_list(semester_re, dept_re):
+class CourseSearch:
     """
-    Given a semester regular expression and a department regular expression,
-    lists all courses offered by that department in the semester.
+    Keeps one browser open for many searches.  Use as a context manager:
+
+        with CourseSearch() as search:
+            for dept in ["^MATH", "^PHYS"]:
+                for course in search.courses("Fall 2025", dept):
+                    ...
+
+    `url` can point to a local copy of the course lookup page.
     """
-    searchurl = "https://webtech.svsu.edu/courses/#!/home#top"
 
-    semester = re.compile(semester_re)
-    dept = re.compile(dept_re)
+    def __init__(self, url=SEARCHURL, headless=True, timeout=10):
+        self.url = url
+        self.headless = headless
+        self.timeout = timeout
+        self.driver = None
 
-    options = webdriver.ChromeOptions()
-    options.add_argument('headless')
-    driver = webdriver.Chrome(options=options)
-    driver.get(searchurl)
+    def __enter__(self):
+        options = webdriver.ChromeOptions()
+        if self.headless:
+            options.add_argument('headless')
+        self.driver = webdriver.Chrome(options=options)
+        self.driver.get(self.url)
+        return self
 
-    enter_selection(driver, "selectterm", semester)
-    enter_selection(driver, "selectdepartment", dept)
+    def __exit__(self, *exc):
+        self.driver.quit()
+        self.driver = None
 
-    submitbutt = driver.find_element_by_id("courseLookupButton")
-    submitbutt.click()
+    def courses(self, semester_re, dept_re):
+        """
+        Yields courses offered by the department in the semester, as dicts
+        from `parse_course`.  Raises TimeoutException if no courses show up
+        in time, which is also what a department with no courses looks like.
+        """
+        driver = self.driver
+        enter_selection(driver, "selectterm", re.compile(semester_re),
+                        self.timeout)
+        enter_selection(driver, "selectdepartment", re.compile(dept_re),
+                        self.timeout)
 
-    sleep(1)
+        # Rows of the previous search, replaced by the new ones
+        old = driver.find_elements(By.ID, "courseTable")
+        driver.find_element(By.ID, "courseLookupButton").click()
 
-    page = bs4.BeautifulSoup(driver.page_source, "lxml")
+        wait = WebDriverWait(driver, self.timeout)
+        try:
+            if old:
+                wait.until(EC.staleness_of(old[0]))
+            wait.until(EC.presence_of_element_located((By.ID, "courseTable")))
+        except TimeoutException:
+            raise TimeoutException("No courses for {} after {} s".format(
+                dept_re, self.timeout))
 
-    driver.quit()
+        page = bs4.BeautifulSoup(driver.page_source, "lxml")
 
-    rowlist = [[cell.getText() for cell in row.find_all("td")]
-               for row in page.find_all(id="courseTable")]
+        for row in page.find_all(id="courseTable"):
+            yield parse_course([cell.getText() for cell in row.find_all("td")])
 
-    return [parse_course(row) for row in rowlist]
+    def all_courses(self, semester_re, dept_res):
+        """
+        Yields (department regexp, course) pairs for several departments.
+        A department whose courses do not show up is skipped with a warning.
+        """
+        for dept_re in dept_res:
+            try:
+                for course in self.courses(semester_re, dept_re):
+                    yield dept_re, course
+            except TimeoutException as e:
+                warn(str(e))
+
+
+def get_course_list(semester_re, dept_re):
+    """
+    Given a semester regular expression and a department regular expression,
+    lists all courses offered by that department in the semester.
+    """
+    with CourseSearch() as search:
+        return [course for _, course in search.all_courses(semester_re,
+                                                           [dept_re])]
@@ -0,0 +1,129 @@
+"""
+Course configs of all courses under `COURSEDIR`, cached.
+
+`canvas_utils.course_conf.get_course_config` reads the config of the course
+in the current directory.  Here the result is kept in memory and pickled in
+`CACHEDIR`, and only read again when a YAML file in the course directory
+changes.  Each cached config comes with an index from section numbers to
+Canvas class ids.
+
+This file lives in `canvas_and_schedule`; the other directories link to it.
+"""
+import pickle
+import sys
+from os import chdir, environ, getcwd, listdir, makedirs, path, scandir
+from watch import write_atomic
+
+COURSEDIR = "~/Classes/"
+
+CACHEDIR = path.join(environ.get("XDG_CACHE_HOME", path.expanduser("~/.cache")),
+                     "svsu-utils", "courses")
+
+_configs = {}
+
+
+def course_path(course=None):
+    """Directory of a course, or the current directory."""
+    if course is None:
+        return getcwd()
+    return path.expanduser(COURSEDIR + course)
+
+
+def stamp(directory):
+    """Modification times of the YAML files in a directory."""
+    return sorted((e.name, e.stat().st_mtime_ns) for e in scandir(directory)
+                  if e.name.endswith(('.yaml', '.yml')))
+
+
+def section_index(config):
+    """Dict from section numbers to class ids."""
+    return {data['secnum']: classid
+            for classid, data in config['sections'].items()
+            if 'secnum' in data}
+
+
+def load(course=None):
+    """
+    Returns (config, section index) for a course.  Raises FileNotFoundError
+    if there is no course config.
+    """
+    directory = course_path(course)
+    current = stamp(directory)
+
+    cached = _configs.get(directory)
+    cache_file = path.join(CACHEDIR, path.abspath(directory).strip('/')
+                           .replace('/', '_') + '.pickle')
+    if cached is None:
+        try:
+            with open(cache_file, 'rb') as f:
+                cached = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            pass
+    # Without YAML files here the config comes from elsewhere; do not cache
+    if current and cached is not None and cached[0] == current:
+        _configs[directory] = cached
+        return cached[1], cached[2]
+
+    import canvas_utils.course_conf as cnf
+    cwd = getcwd()
+    chdir(directory)
+    try:
+        config = cnf.get_course_config()
+    finally:
+        chdir(cwd)
+
+    cached = (current, config, section_index(config))
+    _configs[directory] = cached
+    try:
+        makedirs(CACHEDIR, exist_ok=True)
+        write_atomic(cache_file, pickle.dumps(cached))
+    except OSError:
+        pass
+
+    return config, cached[2]
+
+
+def all_courses():
+    """Names of the directories in `COURSEDIR` that have a course config."""
+    top = path.expanduser(COURSEDIR)
+    courses = []
+    for name in sorted(listdir(top)):
+        if not path.isdir(path.join(top, name)):
+            continue
+        try:
+            load(name)
+        except FileNotFoundError:
+            continue
+        courses.append(name)
+
+    return courses
+
+
+def course_config(course=None):
+    """
+    What the scripts do to get their course: change to the course directory,
+    if one is given, and load its config.  Prints a message and exits if
+    either fails.  Returns (config, section index).
+    """
+    if course is not None:
+        try:
+            chdir(course_path(course))
+        except FileNotFoundError:
+            print("Could not find course {}!".format(course))
+            sys.exit(1)
+
+    try:
+        return load()
+    except FileNotFoundError:
+        print("Cannot find a course config file.\n"
+              "Perhaps you are not in a course directory?")
+        sys.exit(1)
+
+
+def find_section(index, secnum):
+    """Class id of a section, or exits if there is no such section."""
+    if secnum not in index:
+        print("Could not find section {}!".format(secnum))
+        sys.exit(1)
+
+    return index[secnum]
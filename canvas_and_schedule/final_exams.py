@@ -1,11 +1,20 @@
-from yaml import safe_load
+"""
+SVSU final exam schedule table.  Tables are kept as YAML strings in `TABLES`,
+keyed by academic year (the year of the fall semester).  Each table is
+compiled into a lookup index once and pickled into `CACHEDIR`, so later
+imports do not need to parse YAML at all.
+"""
+import hashlib
+import pickle
+from os import environ, makedirs, path
+from watch import write_atomic
 
 # This was extracted from a pdf table downloaded from registrars website.  Lots
 # of hand reformating was done to make it uniform and parseable.  That means
 # errors may have been introduced.  Also, there may be changes from year to
 # year.  Check the results against the official table.
 
-yaml_data = """
+yaml_data_2024 = """
 Slots:
    - 8:30 am – 10:20 am
    - 10:30 am – 12:20 pm
@@ -62,7 +71,15 @@ Friday:
    - WF, F at 20 or 20:30
 """
 
-data = safe_load(yaml_data)
+DEFAULT_YEAR = 2024
+
+# Add tables for other academic years here as the registrar changes them.
+TABLES = {
+    2024: yaml_data_2024,
+}
+
+CACHEDIR = path.join(environ.get("XDG_CACHE_HOME", path.expanduser("~/.cache")),
+                     "svsu-utils", "final_exams")
 
 
 def time_to_minutes(time):
@@ -76,18 +93,103 @@ def parse(v):
     return(l)
 
 
-slots = data["Slots"]
+def build_index(days, slots):
+    """
+    Builds a dict mapping (day pattern, start minute) to (day, slot).  The
+    first match in table order wins, same as walking the table.
+    """
+    index = {}
+    for day, s in days.items():
+        for i, l in enumerate(s):
+            for option in l:
+                for ds in option['days']:
+                    for time in option['times']:
+                        index.setdefault((ds, time), (day, slots[i]))
+
+    return index
+
 
-days = {day: [parse(v) for v in vals] for day, vals in data.items() if day != "Slots"}
+def compile_table(yaml_data):
+    """Parses a YAML table into a dict with slots, days and the index."""
+    from yaml import safe_load
 
+    data = safe_load(yaml_data)
+    slots = data["Slots"]
+    days = {day: [parse(v) for v in vals] for day, vals in data.items() if day != "Slots"}
 
-def find_time(ds, t):
-    time = time_to_minutes(t)
+    return {'slots': slots, 'days': days, 'index': build_index(days, slots)}
 
-    for day, s in days.items():
-        for i, l in enumerate(s):
-            for option in l:
-                if ds in option['days'] and time in option['times']:
-                    return day, slots[i]
 
-    return None, None
+def cache_file(year, yaml_data):
+    """Cache file name, including a hash of the table so edits invalidate it."""
+    digest = hashlib.sha1(yaml_data.encode("utf-8")).hexdigest()[:16]
+    return path.join(CACHEDIR, "{}-{}.pickle".format(year, digest))
+
+
+def table_year(year):
+    """
+    The newest table year that is not after `year`.  Tables stay in effect
+    until the registrar changes them.
+    """
+    if year is None:
+        return DEFAULT_YEAR
+    older = [y for y in TABLES if y <= year]
+    return max(older) if older else min(TABLES)
+
+
+_tables = {}
+
+
+def load_table(year=None):
+    """
+    Returns the compiled table for the academic year, from memory, from the
+    on disk cache, or by compiling the YAML, in that order.
+    """
+    year = table_year(year)
+    if year in _tables:
+        return _tables[year]
+
+    yaml_data = TABLES[year]
+    fn = cache_file(year, yaml_data)
+    try:
+        with open(fn, 'rb') as f:
+            table = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError):
+        table = compile_table(yaml_data)
+        try:
+            makedirs(CACHEDIR, exist_ok=True)
+            write_atomic(fn, pickle.dumps(table))
+        except OSError:
+            pass
+
+    _tables[year] = table
+    return table
+
+
+table = load_table()
+slots = table['slots']
+days = table['days']
+index = table['index']
+
+
+def find_time(ds, t, year=None):
+    return load_table(year)['index'].get((ds, time_to_minutes(t)), (None, None))
+
+
+def find_times(sections, year=None):
+    """
+    Looks up final exam times for a list of (day pattern, start time) pairs.
+    Returns a list of (day, slot) tuples in the same order, and a sorted list
+    of the patterns that were not found in the table.
+    """
+    index = load_table(year)['index']
+    results = []
+    unmatched = set()
+    for ds, t in sections:
+        found = index.get((ds, time_to_minutes(t)))
+        if found is None:
+            unmatched.add((ds, t))
+            found = (None, None)
+        results.append(found)
+
+    return results, sorted(unmatched)
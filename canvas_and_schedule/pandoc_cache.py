@@ -0,0 +1 @@
+../cal_and_dates/pandoc_cache.py
\ No newline at end of file
@@ -3,11 +3,16 @@ Module for parsing a class schedule.  Main interface is `parse_schedule`, that
 takes a schedule file, holiday file, and few class parameters, creates a TeX
 schedule file, and optionally posts schedule to Canvas.
 """
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from warnings import warn
 from markdown import markdown
+from term_store import pattern_offsets
+from watch import write_atomic
+import hashlib
+import io
+import json
 import arrow
 import yaml
-import canvas
 
 def holiday(day, end=None):
     """Creates a event time range."""
@@ -19,9 +24,19 @@ def holiday(day, end=None):
 
     return (start, end)
 
+def holiday_index(holidays):
+    """Set of day ordinals covered by the holiday time ranges.  Build it once
+    and pass it around instead of the holiday dict.  Returns an existing
+    index unchanged."""
+    if isinstance(holidays, frozenset):
+        return holidays
+    return frozenset(o for h in holidays
+                     for o in range(h[0].toordinal(), h[1].toordinal() + 1))
+
 def is_holiday(day, holidays):
-    """Tests if a day falls into one of given holiday time ranges."""
-    return any(h[0] <= day <= h[1] in h for h in holidays)
+    """Tests if a day falls into one of given holiday time ranges.  Takes
+    either a holiday dict or an index from `holiday_index`."""
+    return day.toordinal() in holiday_index(holidays)
 
 def dates_to_holiday(dates):
     """Converts a yaml holiday times to a holiday range."""
@@ -44,40 +59,54 @@ def load_holidays(file):
     return startdate, {dates_to_holiday(dates): name for name, dates in hdata.items() if
                        name != "Classes Begin"}
 
+def class_ordinals(start, weeks, pattern, holidays=None):
+    """
+    Day ordinals of class meetings for a day pattern, in order, for `weeks`
+    weeks after the week of `start`.  Days before `start` are skipped.  If
+    `holidays` is given, holidays are skipped too.
+    """
+    offsets = pattern_offsets(pattern)
+    first = start.toordinal()
+    monday = first - start.weekday()
+    hindex = frozenset() if holidays is None else holiday_index(holidays)
+
+    for week in range(monday, monday + 7 * (weeks + 1), 7):
+        for off in offsets:
+            o = week + off
+            if o >= first and o not in hindex:
+                yield o
+
+def class_days(start, weeks, pattern, holidays=None):
+    """Like `class_ordinals`, but gives Arrow days."""
+    first = start.toordinal()
+    return [start.replace(days=+(o - first))
+            for o in class_ordinals(start, weeks, pattern, holidays)]
+
 def MW(start, weeks, holidays=None):
     """
     Assume start is Monday.
     """
-    days = [day for day in arrow.Arrow.range("week", start, start.replace(weeks=+weeks))]
-    wed = start.replace(days=+2)
-    days += [day for day in arrow.Arrow.range("week", wed, wed.replace(weeks=+weeks))]
-
-    if holidays is None:
-        return sorted([day for day in days])
-
-    return sorted([day for day in days if not is_holiday(day, holidays)])
+    return class_days(start, weeks, "MW", holidays)
 
 def TR(start, weeks, holidays=None):
     """
-    Assume start is Tuesday.
+    Assume start is Monday of the first week.
     """
-    tue = start.replace(days=+1)
-    days = [day for day in arrow.Arrow.range("week", tue, tue.replace(weeks=+weeks))]
-    thu = tue.replace(days=+2)
-    days += [day for day in arrow.Arrow.range("week", thu, thu.replace(weeks=+weeks))]
-
-    if holidays is None:
-        return sorted([day for day in days])
-
-    return sorted([day for day in days if not is_holiday(day, holidays)])
+    return class_days(start, weeks, "TR", holidays)
 
 def mkeventlist(events, dayfun, start, holidays, weeks=14):
     """Go trough list of events and schedule them into available dates,
-    avoiding holidays."""
+    avoiding holidays.  `dayfun` is either a day pattern string, like "MWF",
+    or a function like `MW`."""
+    holidays = holiday_index(holidays)
+    if isinstance(dayfun, str):
+        days = class_ordinals(start, weeks, dayfun)
+    else:
+        days = (day.toordinal() for day in dayfun(start, weeks))
     i = iter(events)
     l = []
-    for day in dayfun(start, weeks):
-        if is_holiday(day, holidays):
+    for day in days:
+        if day in holidays:
             l.append(("", "Holiday"))
         else:
             try:
@@ -121,20 +150,38 @@ TeXHead = r"""
 }
 """
 
+DAYNAMES = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday']
+
+def TeXClassDays(dow):
+    """Calendar days for a day pattern.  MW and TR have their own macros."""
+    if dow in ("MW", "TR"):
+        return "\\" + dow + "Class"
+    offsets = pattern_offsets(dow)
+    return "".join("\\calday[{}]{{\\classday}}".format(name) if i in offsets
+                   else "\\skipday" for i, name in enumerate(DAYNAMES)) + \
+        "\\skipday\\skipday"
+
 def TeXCalStart(startdate, dow, weeks=15):
-    """Start of TeX calendar string. dow = TR or MW"""
+    """Start of TeX calendar string. dow is a day pattern, like TR or MWF"""
     tex = r"\begin{document}\begin{center}\begin{calendar}{" + startdate + "}{"
-    tex += str(weeks) + "}\\setlength{\\calboxdepth}{.3in}\\" + dow + "Class"
+    tex += str(weeks) + "}\\setlength{\\calboxdepth}{.3in}" + TeXClassDays(dow)
     return tex
 
+def TeXHolidays(holidays):
+    """Holiday block of TeX calendar.  Same for every calendar in a term, so
+    render it once and pass it to `TeXCalEnd`."""
+    return "%Holidays\n" + "".join(
+        "\\Holiday{{{}}}{{{}}}\n".format(day.format('M/D/YYYY'), t)
+        for d, t in holidays.items()
+        for day in arrow.Arrow.range('day', d[0], d[1]))
+
 def TeXCalEnd(holidays):
-    """End of TeX calendar string."""
-    tex = "%Holidays\n"
-    for d, t in holidays.items():
-        for day in arrow.Arrow.range('day', d[0], d[1]):
-            tex += "\\Holiday{{{}}}{{{}}}\n".format(day.format('M/D/YYYY'), t)
+    """End of TeX calendar string.  `holidays` is either the holiday dict or
+    a block rendered by `TeXHolidays`."""
+    if not isinstance(holidays, str):
+        holidays = TeXHolidays(holidays)
 
-    return tex + r"\end{calendar}\end{center}\end{document}"
+    return holidays + r"\end{calendar}\end{center}\end{document}"
 
 def TeXCalItems(eventlist):
     """TeX representation of event list."""
@@ -144,25 +191,49 @@ def TeXCalItems(eventlist):
     for s, _ in eventlist[1:]:
         yield str2.format(s)
 
+def TeXCalFragments(start, dow, events, holidays, weeks=15):
+    """TeX calendar as a sequence of strings, for writing straight to a
+    file."""
+    yield TeXCalStart(start, dow, weeks)
+    for i, item in enumerate(TeXCalItems(events)):
+        yield "\n" + item if i else item
+    yield TeXCalEnd(holidays)
+
 def TeXCal(start, dow, events, holidays, weeks=15):
     """Put together all the infor and create a TeX calendar."""
-    texstring = TeXCalStart(start, dow, weeks)
-    texstring += "\n".join(list(TeXCalItems(events)))
-    texstring += TeXCalEnd(holidays)
-    return texstring
+    return "".join(TeXCalFragments(start, dow, events, holidays, weeks))
+
+def write_tex(out, start, dow, events, holidays, weeks=15):
+    """Write TeX calendar to an open file, or anything with `write`."""
+    out.write(TeXHead)
+    for fragment in TeXCalFragments(start, dow, events, holidays, weeks):
+        out.write(fragment)
 
 def write_tex_file(fn, start, dow, events, holidays, weeks=15):
-    """Write TeX calendar into a file."""
-    with open(fn, 'w') as texfile:
-        texfile.writelines([TeXHead,
-                            TeXCal(start, dow, events, holidays, weeks)])
+    """Write TeX calendar into a file.  The file is replaced at once, so
+    nobody sees it half written."""
+    out = io.StringIO()
+    write_tex(out, start, dow, events, holidays, weeks)
+    write_atomic(fn, out.getvalue())
+
+_blocks = {}
+
+def markdown_block(md, previous):
+    """HTML of one day, remembered so unchanged days are not converted again
+    in `watch_schedule`.  Takes the days remembered by the previous read."""
+    if md not in _blocks:
+        _blocks[md] = previous[md] if md in previous else markdown(md)
+    return _blocks[md]
 
 def read_event_list(datafile):
     "Reads event list from a markdown file"
+    global _blocks
     with open(datafile, 'r') as data:
         schedule_str = data.read()
 
-    days = [(lambda d: (d[0], markdown(d[1])))(s.split('\n',1))
+    # Keep only the days of this version of the file
+    previous, _blocks = _blocks, {}
+    days = [(lambda d: (d[0], markdown_block(d[1], previous)))(s.split('\n',1))
             for s in schedule_str.split('\n## ')]
 
     # The first line will start with ## .  Remove it:
@@ -171,18 +242,101 @@ def read_event_list(datafile):
 
     return days
 
+SYNCFILE = ".canvas_events.json"
+
+def schedule_events(el, start, firstclass, dow, length, weeks=14):
+    """Canvas event fields for each class meeting in the event list, keyed by
+    date.  Holidays and empty days are left out."""
+    first = firstclass.toordinal()
+    events = {}
+    for o, ev in zip(class_ordinals(start, weeks, dow), el):
+        if not isinstance(ev, tuple) or ev == ("", "Holiday"):
+            continue
+        begin = firstclass.replace(days=+(o - first))
+        events[begin.format("YYYY-MM-DD")] = {
+            'title': ev[0],
+            'description': ev[1],
+            'start_at': begin.isoformat(),
+            'end_at': begin.replace(minutes=+length).isoformat(),
+        }
+
+    return events
+
+def event_hash(event):
+    return hashlib.sha1(json.dumps(event, sort_keys=True).encode()).hexdigest()
+
+def sync_events(classid, events, recordfile=SYNCFILE, jobs=8):
+    """
+    Makes the Canvas calendar of a course match `events`, creating, updating
+    and deleting only what changed since the last sync.  Ids and hashes of
+    posted events are kept in `recordfile`.  Returns counts of created,
+    updated and deleted events.  If some requests fail, the others still
+    go through and are recorded, and the first error is raised at the end.
+    """
+    import canvas_api
+
+    try:
+        with open(recordfile, 'r') as f:
+            record = json.load(f)
+    except FileNotFoundError:
+        record = {}
+    posted = record.setdefault(str(classid), {})
+
+    tasks = []
+    for key, event in events.items():
+        h = event_hash(event)
+        if key not in posted:
+            tasks.append(('created', key, h, canvas_api.create_event, (classid, event)))
+        elif posted[key]['hash'] != h:
+            tasks.append(('updated', key, h, canvas_api.update_event,
+                          (posted[key]['id'], event)))
+    for key in posted.keys() - events.keys():
+        tasks.append(('deleted', key, None, canvas_api.delete_event, (posted[key]['id'],)))
+
+    counts = {'created': 0, 'updated': 0, 'deleted': 0}
+    failed = []
+    s = canvas_api.session(pool=jobs)
+    throttle = canvas_api.Throttle(jobs)
+    # Every outcome is recorded as it comes in, and the record is saved only
+    # after all requests are done, so events created by requests still
+    # running when another one fails are not created again next time.
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        futures = {pool.submit(fn, s, *fnargs, throttle=throttle):
+                   (kind, key, h) for kind, key, h, fn, fnargs in tasks}
+        for future in as_completed(futures):
+            kind, key, h = futures[future]
+            try:
+                eventid = future.result()
+            except Exception as e:
+                warn("Could not {} event {}: {}".format(kind[:-1], key, e))
+                failed.append(e)
+                continue
+            if kind == 'deleted':
+                del posted[key]
+            else:
+                posted[key] = {'id': eventid, 'hash': h}
+            counts[kind] += 1
+
+    write_atomic(recordfile, json.dumps(record, indent=1, sort_keys=True))
+
+    if failed:
+        raise failed[0]
+    return counts
+
 def parse_schedule(classid, datafile, holidayfile, dow, hour, minute,
-                   length=110, post=False, manualstart=None):
+                   length=110, post=False, manualstart=None, sync=False):
     """
     Reads event list form datafile, holidays from holidayfile, and sets up a
     schedule.
 
-    dow: day of week
+    dow: day pattern, like MW, TR or MWF
     hour: starting hour on 24 hour format
     minute: starting minute
     length: class length in minutes
     post: if True, post on canvas
     manualstart: specify this is "Classes Begin" is not in holiday file
+    sync: with post, only create, update or delete events that changed since
+          the last post, instead of posting everything again
     """
 
     start, hdays = load_holidays(holidayfile)
@@ -197,11 +351,29 @@ def parse_schedule(classid, datafile, holidayfile, dow, hour, minute,
 
     write_tex_file("sched.tex", start.format("MM/DD/YYYY"), dow, event_list, hdays)
 
-    el = mkeventlist(event_list, funindex[dow], start, hdays)
+    el = mkeventlist(event_list, dow, start, holiday_index(hdays))
 
     if post and classid != 0:
+        import canvas
         firstclass = canvas.firstclass(start.month, start.day, hour, minute)
-        if dow == "TR":
-            firstclass = firstclass.replace(days=+1)
+        firstclass = firstclass.replace(days=+pattern_offsets(dow)[0])
         canvas.read_access_token()
+        if sync:
+            return sync_events(classid, schedule_events(el, start, firstclass,
+                                                        dow, length))
         canvas.create_events_from_list(classid, el, firstclass, length)
+
+def watch_schedule(classid, datafile, holidayfile, *args, **kwargs):
+    """
+    Runs `parse_schedule` now and again every time the schedule or the
+    holiday file changes.  Takes the same arguments.  Use with `sync=True`
+    when posting, so only changed events are sent to Canvas.
+    """
+    from watch import changes
+
+    parse_schedule(classid, datafile, holidayfile, *args, **kwargs)
+    for _ in changes([datafile, holidayfile]):
+        try:
+            parse_schedule(classid, datafile, holidayfile, *args, **kwargs)
+        except Exception as e:
+            warn("Rebuild failed: {}".format(e))
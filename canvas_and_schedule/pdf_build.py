@@ -0,0 +1 @@
+../cal_and_dates/pdf_build.py
\ No newline at end of file
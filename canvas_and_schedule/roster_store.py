@@ -0,0 +1,102 @@
+"""
+Snapshots of course rosters, for finding adds, drops and section changes.
+
+Each section's roster is stored in `SNAPDIR/<course>/<class id>.json` in a
+compact form: a dict from student id to the values of `FIELDS`, and a digest
+of it.  A snapshot is only written when the digest changes, so running this
+from cron many times a day does not touch unchanged files.  The first
+snapshot of a section is the starting point: its students are not adds.
+"""
+import hashlib
+import json
+from os import environ, makedirs, path
+from watch import write_atomic
+
+SNAPDIR = path.join(environ.get("XDG_DATA_HOME",
+                                path.expanduser("~/.local/share")),
+                    "svsu-utils", "rosters")
+
+FIELDS = ['name', 'sortable_name', 'sis_user_id', 'login_id', 'email']
+
+
+def compact(students):
+    """Dict from student id (as a string) to the values of `FIELDS`."""
+    return {str(s['id']): [s.get(f) for f in FIELDS] for s in students}
+
+
+def digest(section, students):
+    data = json.dumps([section, students], sort_keys=True)
+    return hashlib.sha1(data.encode("utf-8")).hexdigest()
+
+
+def snapshot_file(course, classid, snapdir=None):
+    return path.join(snapdir or SNAPDIR, course, "{}.json".format(classid))
+
+
+def load(course, classid, snapdir=None):
+    """The stored snapshot of a section, or None."""
+    try:
+        with open(snapshot_file(course, classid, snapdir), 'r') as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def save(course, classid, section, students, snapdir=None):
+    """
+    Stores a snapshot of a section, from a compacted roster.  Does nothing
+    if it is the same as the stored one.  Returns True if it wrote.
+    """
+    snapshot = {'section': section, 'students': students,
+                'digest': digest(section, students)}
+    old = load(course, classid, snapdir)
+    if old is not None and old.get('digest') == snapshot['digest']:
+        return False
+
+    fn = snapshot_file(course, classid, snapdir)
+    makedirs(path.dirname(fn), exist_ok=True)
+    write_atomic(fn, json.dumps(snapshot, separators=(',', ':')))
+    return True
+
+
+def index(snapshots):
+    """
+    Takes a list of (course, snapshot) and returns a dict from
+    (course, student id) to (sections, fields), where sections is a sorted
+    tuple, since a student can be in more than one section of a course.
+    """
+    found = {}
+    for course, snapshot in snapshots:
+        for sid, fields in snapshot['students'].items():
+            sections, _ = found.get((course, sid), ((), None))
+            found[course, sid] = (tuple(sorted(sections +
+                                               (snapshot['section'],))),
+                                  fields)
+    return found
+
+
+def changes(old, new, baseline=()):
+    """
+    Compares two indices from `index` and yields a dict for every add,
+    drop and section change, ready to be written as a JSON line.
+    `baseline` has the (course, section) pairs with no earlier snapshot;
+    their students are taken as the starting point, not as adds.
+    """
+    def record(change, key, sections, fields):
+        r = {'change': change, 'course': key[0], 'id': key[1]}
+        r.update(zip(FIELDS, fields))
+        r['section'] = list(sections)
+        return r
+
+    for key, (sections, fields) in new.items():
+        before = old.get(key)
+        if before is None:
+            if not all((key[0], s) in baseline for s in sections):
+                yield record('add', key, sections, fields)
+        elif before[0] != sections:
+            r = record('section', key, sections, fields)
+            r['from'] = list(before[0])
+            yield r
+    for key in sorted(old.keys() - new.keys()):
+        sections, fields = old[key]
+        yield record('drop', key, sections, fields)
@@ -0,0 +1,185 @@
+"""
+Parsing of the course search page into section dicts.  The page source is
+parsed in one go with BeautifulSoup, instead of asking the browser about
+every table, row and cell.  Used by `svsu_get_schedule`.
+"""
+import re
+import sys
+import bs4
+
+
+def print_stderr(*args, **kwargs):
+    print(*args, file=sys.stderr, **kwargs)
+
+
+# Elements that start a new line of text in the browser
+BLOCK_TAGS = {
+    'address', 'article', 'aside', 'blockquote', 'caption', 'dd', 'div',
+    'dl', 'dt', 'fieldset', 'figcaption', 'figure', 'footer', 'form', 'h1',
+    'h2', 'h3', 'h4', 'h5', 'h6', 'header', 'hr', 'li', 'main', 'nav', 'ol',
+    'p', 'pre', 'section', 'table', 'tbody', 'td', 'tfoot', 'th', 'thead',
+    'tr', 'ul',
+}
+
+
+def text_pieces(element):
+    """Text of an element in pieces, with '\n' where the browser breaks
+    lines.  Runs of whitespace in the text become single spaces."""
+    for child in element.children:
+        if isinstance(child, bs4.element.PreformattedString):
+            continue  # comments, doctypes and such
+        if isinstance(child, bs4.NavigableString):
+            yield re.sub(r'\s+', ' ', child)
+        elif child.name == 'br':
+            yield '\n'
+        elif child.name in ('script', 'style'):
+            continue
+        elif child.name in BLOCK_TAGS:
+            yield '\n'
+            yield from text_pieces(child)
+            yield '\n'
+        else:
+            yield from text_pieces(child)
+
+
+def html_text(element):
+    """
+    Approximates what the browser shows as element text, like WebDriver's
+    `.text`: lines break only at block elements and <br>, and each line has
+    its whitespace collapsed.
+    """
+    text = ''.join(text_pieces(element))
+    lines = (' '.join(line.split()) for line in text.split('\n'))
+    return '\n'.join(line for line in lines if line)
+
+
+HIDDEN_CLASSES = {'hidden', 'hide', 'esg-hide', 'd-none'}
+
+
+def html_visible(row, table):
+    """
+    Tries to tell if a table row is displayed, from the attributes of the row
+    and its ancestors within the table.
+    """
+    element = row
+    while element is not None and element is not table:
+        style = element.get('style', '').replace(' ', '').lower()
+        if (element.has_attr('hidden')
+                or 'display:none' in style
+                or element.get('aria-hidden') == 'true'
+                or HIDDEN_CLASSES & set(element.get('class', []))):
+            return False
+        element = element.parent
+
+    return True
+
+
+def html_row(row):
+    cells = [html_text(cell) for cell in row.find_all('td')]
+    if len(cells) == 4:
+        return {'seats': cells[0], 'time': cells[1], 'locashun': cells[2],
+                'instructours': cells[3]}
+    if len(cells) == 2:
+        return {'seats': None, 'time': cells[0], 'locashun': cells[1],
+                'instructours': None}
+
+    print_stderr('Weird number of cells in this row!')
+    print_stderr(len(cells))
+    sys.exit()
+
+
+def html_section(table):
+    caption = table.find('caption')
+    if caption is None:
+        print('Cannot find caption')
+        sys.exit()
+
+    # Visible rows except the first one which is a header
+    rows = [html_row(r) for r in table.find_all('tr')[1:]
+            if html_visible(r, table)]
+
+    # The caption's textContent, with its newlines; strip_section keeps the
+    # first line
+    return {'caption': caption.get_text(), 'rows': rows}
+
+
+def extract_sections_from_html(html):
+    """
+    Section dicts from the source of a course search page with all courses
+    expanded.
+    """
+    page = bs4.BeautifulSoup(html, 'lxml')
+    cours_ul = page.find(id='course-resultul')
+    if cours_ul is None:
+        print_stderr('Cannot find course list')
+        sys.exit()
+
+    return [
+        html_section(sec)
+        for c in cours_ul.find_all(class_='esg-collapsible-group')
+        for sec in c.find_all('table')
+    ]
+
+
+def us_to_sane_time(ustime):
+    """
+    Gets a time in 00:00 *M format and returns a sane 24 hour one
+    Does not deal with midnight as there are no classes at midnight
+    so 12 am and 12 pm will all result in noon.
+    """
+
+    parts = ustime.split()
+    if len(parts) != 2:
+        print_stderr('invalid time format')
+        print_stderr(ustime)
+        sys.exit()
+    moparts = parts[0].split(':')
+    if len(moparts) != 2:
+        print_stderr('invalid time format')
+        print_stderr(ustime)
+        sys.exit()
+    if (parts[1].upper() == 'AM') or (moparts[0] == '12'):
+        return parts[0]
+
+    return '{}:{}'.format(int(moparts[0]) + 12, moparts[1])
+
+
+def strip_section(section):
+    """
+    Gets useful info for one section, returns a dict.
+    """
+
+    if section['caption']:
+        caption = section['caption'].splitlines()[0].replace('*', '-')
+    else:
+        caption = ''
+
+    row = section['rows'][0]
+
+    # For hybrid classes, the first row does not contain any
+    # useful info. We will assume that all meetings happen at the
+    # same weekday, the same time, and the same location, and simply
+    # use the second row. It would be hard to create a weekly
+    # schedule if that was not true, anyway.
+
+    if "Hybrid" in row['locashun'] and len(section['rows']) > 1:
+        row = section['rows'][1]
+
+    loc = (
+        row['locashun']
+        .splitlines()[0]
+        .replace('SVSU Main Campus, ', '')
+    )
+
+    time = row['time'].splitlines()[0]
+    time_split = time.split(' ', 1)
+    days = time_split[0].split('/')
+    times = [us_to_sane_time(time) for time in time_split[1].split(' - ')]
+
+    return {
+        'caption': caption,
+        'loc': loc,
+        'days': days,
+        'start': times[0],
+        'end': times[1],
+    }
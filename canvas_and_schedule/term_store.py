@@ -0,0 +1 @@
+../cal_and_dates/term_store.py
\ No newline at end of file
@@ -0,0 +1 @@
+../cal_and_dates/timing.py
\ No newline at end of file
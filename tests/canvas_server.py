@@ -0,0 +1,176 @@
+"""
+A local stand-in for the Canvas API that charges a request budget the way
+Canvas does, answers 403 "Rate Limit Exceeded" when it runs out, and
+reports what is left in X-Rate-Limit-Remaining.
+
+POSTs answer with a new id.  GET courses/:id/users lists `rosters[id]`,
+`per_page` (at most `page_size`) at a time, with a Link header to the next
+page.  Calendar events are created, changed and deleted in `events`, a dict
+from id to the posted form fields.
+"""
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlencode, urlsplit
+
+
+class CanvasServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, budget=700.0, cost=100.0, refill=1500.0, delay=0.1,
+                 status=None, rosters=None, page_size=10, fail=None):
+        super().__init__(('127.0.0.1', 0), Handler)
+        self.budget = budget
+        self.capacity = budget
+        self.cost = cost
+        self.refill = refill
+        self.delay = delay
+        # Fixed (status, headers) answers for some paths, for error tests
+        self.status = status or {}
+        # A function of (method, path, form fields) that returns a status to
+        # answer with instead, or None, for failing some of the requests
+        self.fail = fail
+        # Students of each course id, for GET courses/:id/users
+        self.rosters = rosters or {}
+        self.page_size = page_size
+        self.events = {}
+        self.next_event = 1
+        self.lock = threading.Lock()
+        self.last = time.monotonic()
+        self.active = 0
+        self.max_active = 0
+        self.requests = []
+        self.throttled = 0
+
+    @property
+    def url(self):
+        return 'http://127.0.0.1:{}/api/v1'.format(self.server_address[1])
+
+    def __enter__(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+        self.server_close()
+
+    def charge(self):
+        """Takes the cost of a request from the budget.  Returns what is
+        left, negative if the request is throttled."""
+        with self.lock:
+            now = time.monotonic()
+            self.budget = min(self.capacity,
+                              self.budget + (now - self.last) * self.refill)
+            self.last = now
+            if self.budget < self.cost:
+                self.throttled += 1
+                return -1
+            self.budget -= self.cost
+            return self.budget
+
+
+class Handler(BaseHTTPRequestHandler):
+
+    def log_message(self, *args):
+        pass
+
+    def reply(self, status, body, headers=()):
+        self.send_response(status)
+        for k, v in headers:
+            self.send_header(k, v)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def form(self):
+        """The form fields of the request body, one value each."""
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        return {k: v[0] for k, v in parse_qs(body.decode()).items()}
+
+    def serve(self, answer, form=None):
+        """Charges the request and replies with what `answer()` returns, a
+        status, a JSON body and extra headers."""
+        server = self.server
+        with server.lock:
+            server.requests.append(self.path)
+            server.active += 1
+            server.max_active = max(server.max_active, server.active)
+        try:
+            if self.path in server.status:
+                status, headers = server.status[self.path]
+                self.reply(status, b'error', headers)
+                return
+            status = server.fail and server.fail(self.command, self.path,
+                                                 form or {})
+            if status:
+                self.reply(status, b'error')
+                return
+            remaining = server.charge()
+            time.sleep(server.delay)
+            headers = [('X-Rate-Limit-Remaining', str(max(remaining, 0)))]
+            if remaining < 0:
+                self.reply(403, b'403 Forbidden (Rate Limit Exceeded)',
+                           headers + [('Retry-After', '0.05')])
+            else:
+                with server.lock:
+                    status, body, extra = answer()
+                self.reply(status, json.dumps(body).encode(),
+                           headers + extra)
+        finally:
+            with server.lock:
+                server.active -= 1
+
+    def do_POST(self):
+        form = self.form()
+
+        def answer():
+            if self.path == '/api/v1/calendar_events':
+                eventid = self.server.next_event
+                self.server.next_event += 1
+                self.server.events[eventid] = form
+                return 200, {'id': eventid}, []
+            return 200, {'id': len(self.server.requests),
+                         'html_url': 'http://canvas' + self.path}, []
+        self.serve(answer, form)
+
+    def event(self, change):
+        """Answers a request to calendar_events/:id with `change(id)`."""
+        match = re.fullmatch(r'/api/v1/calendar_events/(\d+)', self.path)
+
+        def answer():
+            if match is None or int(match.group(1)) not in self.server.events:
+                return 404, {'errors': [{'message': 'not found'}]}, []
+            change(int(match.group(1)))
+            return 200, {'id': int(match.group(1))}, []
+        return answer
+
+    def do_PUT(self):
+        form = self.form()
+        self.serve(self.event(lambda i: self.server.events[i].update(form)),
+                   form)
+
+    def do_DELETE(self):
+        self.serve(self.event(lambda i: self.server.events.pop(i)))
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        query = parse_qs(url.query)
+        match = re.fullmatch(r'/api/v1/courses/(\d+)/users', url.path)
+
+        def answer():
+            if match is None or int(match.group(1)) not in self.server.rosters:
+                return 404, {'errors': [{'message': 'not found'}]}, []
+            students = self.server.rosters[int(match.group(1))]
+            per_page = min(int(query.get('per_page', ['10'])[0]),
+                           self.server.page_size)
+            page = int(query.get('page', ['1'])[0])
+            extra = []
+            if page * per_page < len(students):
+                query['page'] = [str(page + 1)]
+                extra.append(('Link', '<http://{}:{}{}?{}>; rel="next"'.format(
+                    *self.server.server_address, url.path,
+                    urlencode(query, doseq=True))))
+            return 200, students[(page - 1) * per_page:page * per_page], extra
+        self.serve(answer)
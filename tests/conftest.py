@@ -0,0 +1,10 @@
+"""
+The scripts are not a package; their modules are imported from the script
+directories, the same way the scripts do.
+"""
+import sys
+from os import path
+
+HERE = path.dirname(path.abspath(__file__))
+sys.path[:0] = [path.join(HERE, '..', 'cal_and_dates'),
+                path.join(HERE, '..', 'canvas_and_schedule')]
@@ -0,0 +1,75 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+import requests
+
+import canvas_api
+from canvas_server import CanvasServer
+
+
+@pytest.fixture
+def api(monkeypatch):
+    def connect(server, jobs=8):
+        monkeypatch.setattr(canvas_api, 'APIURL', server.url)
+        return canvas_api.session('token', pool=jobs)
+    return connect
+
+
+def test_posts_all_sections_when_throttled(api):
+    with CanvasServer() as server:
+        s = api(server)
+        throttle = canvas_api.Throttle(8)
+        with ThreadPoolExecutor(8) as pool:
+            results = list(pool.map(
+                lambda c: canvas_api.post_announcement(s, c, 'Hi', '<p>Hi</p>',
+                                                       throttle),
+                range(30)))
+
+    assert server.throttled > 0
+    assert all(r['html_url'] for r, _ in results)
+    assert sum(retries for _, retries in results) == server.throttled
+    assert len(server.requests) == 30 + server.throttled
+
+
+def test_throttle_lowers_concurrency():
+    throttle = canvas_api.Throttle(8)
+
+    class Response:
+        status_code = 200
+        text = ''
+        headers = {'X-Rate-Limit-Remaining': '50'}
+
+    throttle.update(Response())
+    assert throttle.limit == 1
+    Response.headers = {'X-Rate-Limit-Remaining': '600'}
+    throttle.update(Response())
+    assert throttle.limit == 2
+
+
+def test_post_not_retried_on_server_error(api):
+    path = '/api/v1/courses/1/discussion_topics'
+    with CanvasServer(status={path: (502, ())}) as server:
+        with pytest.raises(requests.HTTPError):
+            canvas_api.post_announcement(api(server), 1, 'Hi', '<p>Hi</p>')
+
+    assert server.requests == [path]
+
+
+def test_post_retried_on_503_with_retry_after(api):
+    path = '/api/v1/courses/1/discussion_topics'
+    with CanvasServer(status={path: (503, [('Retry-After', '0')])}) as server:
+        with pytest.raises(requests.HTTPError):
+            canvas_api.request(api(server), 'POST', 'courses/1/discussion_topics',
+                               retries=2)
+
+    assert server.requests == [path] * 3
+
+
+def test_pages_follow_link_header(api):
+    students = [{'id': i, 'name': 'Student {}'.format(i)} for i in range(25)]
+    with CanvasServer(rosters={7: students}, page_size=10) as server:
+        pages = list(canvas_api.get_students(api(server), 7))
+
+    assert [len(page) for page in pages] == [10, 10, 5]
+    assert [s for page in pages for s in page] == students
+    assert len(server.requests) == 3
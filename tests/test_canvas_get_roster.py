@@ -0,0 +1,66 @@
+"""
+Runs canvas_get_roster against the local Canvas stand-in.  The course config
+comes from a course.yaml read by a small stand-in for
+`canvas_utils.course_conf`.
+"""
+import csv
+import io
+import subprocess
+import sys
+from os import environ, path
+
+from canvas_server import CanvasServer
+
+SCRIPT = path.join(path.dirname(__file__), '..', 'canvas_and_schedule',
+                   'canvas_get_roster')
+
+COURSE_CONF = '''
+import yaml
+
+
+def get_course_config():
+    with open('course.yaml') as f:
+        return yaml.safe_load(f)
+'''
+
+COURSE_YAML = '''
+sections:
+  301: {secnum: '03'}
+  101: {secnum: '01'}
+  201: {secnum: '02'}
+'''
+
+
+def roster(classid, n):
+    return [{'id': classid * 100 + i, 'name': 'Student {}'.format(i),
+             'email': 's{}@svsu.edu'.format(classid * 100 + i)}
+            for i in range(n)]
+
+
+def test_sections_written_in_config_order_page_by_page(tmp_path):
+    conf = tmp_path / 'lib' / 'canvas_utils'
+    conf.mkdir(parents=True)
+    (conf / '__init__.py').write_text('')
+    (conf / 'course_conf.py').write_text(COURSE_CONF)
+    course = tmp_path / 'MATH120'
+    course.mkdir()
+    (course / 'course.yaml').write_text(COURSE_YAML)
+
+    rosters = {301: roster(301, 3), 101: roster(101, 25), 201: roster(201, 12)}
+    with CanvasServer(rosters=rosters, page_size=10) as server:
+        env = dict(environ, CANVAS_API_URL=server.url, CANVAS_TOKEN='token',
+                   XDG_CACHE_HOME=str(tmp_path / 'cache'),
+                   PYTHONPATH=str(tmp_path / 'lib'))
+        res = subprocess.run([sys.executable, SCRIPT, '--jobs', '3'],
+                             cwd=str(course), env=env, stdout=subprocess.PIPE,
+                             universal_newlines=True, timeout=60)
+
+    assert res.returncode == 0
+    rows = list(csv.DictReader(io.StringIO(res.stdout)))
+    assert [(r['id'], r['section']) for r in rows] == \
+        [(str(s['id']), secnum)
+         for classid, secnum in [(301, '03'), (101, '01'), (201, '02')]
+         for s in rosters[classid]]
+    # One request per page: 1 + 3 + 2
+    assert len(server.requests) == 6
+    assert server.max_active > 1
@@ -0,0 +1,34 @@
+from conflicts import find_conflicts
+
+
+def section(caption, instructor, loc, start, end, days='MW'):
+    return {'caption': caption, 'instructor': instructor, 'loc': loc,
+            'days': days, 'start': start, 'end': end}
+
+
+def test_team_taught_section_is_not_its_own_conflict():
+    # summary.csv lists a team-taught section once per instructor
+    report = find_conflicts([
+        section('MATH-300-01', 'Smith, J', 'SE 131', '10:30', '11:45'),
+        section('MATH-300-01', 'Jones, A', 'SE 131', '10:30', '11:45'),
+    ])
+
+    assert report['sections'] == 1
+    assert report['room'] == []
+    assert report['instructor'] == []
+    assert report['final_exam'] == []
+
+
+def test_team_taught_section_against_another():
+    report = find_conflicts([
+        section('MATH-300-01', 'Smith, J', 'SE 131', '10:30', '11:45'),
+        section('MATH-300-01', 'Jones, A', 'SE 131', '10:30', '11:45'),
+        section('MATH-120-02', 'Jones, A', 'SE 131', '11:00', '12:15'),
+    ])
+
+    assert [(c['day'], c['sections']) for c in report['room']] == [
+        ('M', ['MATH-300-01', 'MATH-120-02']),
+        ('W', ['MATH-300-01', 'MATH-120-02']),
+    ]
+    assert [(c['instructor'], c['day']) for c in report['instructor']] == [
+        ('Jones, A', 'M'), ('Jones, A', 'W')]
@@ -0,0 +1,49 @@
+"""
+Runs `CourseSearch` against a saved copy of the course lookup page, served
+locally.  Needs Chrome and chromedriver; skipped without them.
+"""
+import shutil
+import threading
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from os import path
+
+import pytest
+
+pytest.importorskip("selenium")
+
+pytestmark = pytest.mark.skipif(
+    not shutil.which('chromedriver'),
+    reason="needs Chrome and chromedriver")
+
+FIXTURES = path.join(path.dirname(__file__), 'fixtures')
+
+
+class Quiet(SimpleHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def lookup_page():
+    server = ThreadingHTTPServer(('127.0.0.1', 0),
+                                 partial(Quiet, directory=FIXTURES))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield 'http://127.0.0.1:{}/course_lookup.html'.format(server.server_port)
+    server.shutdown()
+
+
+def test_departments_with_and_without_courses(lookup_page):
+    from course_list import CourseSearch
+
+    with CourseSearch(url=lookup_page, timeout=2) as search:
+        with pytest.warns(UserWarning, match='ART'):
+            found = list(search.all_courses('Fall 2025',
+                                            ['^MATH', '^ART', '^PHYS']))
+
+    assert [(dept, c['dept'], c['number'], c['section'], c['instructor'])
+            for dept, c in found] == [
+        ('^MATH', 'MATH', '120', '01', 'Smith, J'),
+        ('^MATH', 'MATH', '161', '02', 'Jones, A'),
+        ('^PHYS', 'PHYS', '111', '01', 'Lee, K'),
+    ]
@@ -0,0 +1,49 @@
+import sys
+import types
+
+import pytest
+
+import pandoc_cache
+
+
+@pytest.fixture
+def pandoc(monkeypatch, tmp_path):
+    """A stand-in for pypandoc that upper-cases its input and counts runs.
+    `keep_break = False` makes it lose the break paragraphs."""
+    fake = types.ModuleType('pypandoc')
+    fake.runs = []
+    fake.keep_break = True
+
+    def convert_text(text, to, format=None, extra_args=()):
+        fake.runs.append(text)
+        if not fake.keep_break:
+            text = text.replace(pandoc_cache.BREAK, '')
+        return text.upper() + '\n'
+
+    fake.convert_text = convert_text
+    monkeypatch.setitem(sys.modules, 'pypandoc', fake)
+    monkeypatch.setattr(pandoc_cache, 'CACHEDIR', str(tmp_path))
+    return fake
+
+
+def test_missing_texts_converted_in_one_run(pandoc):
+    days = ['## Mon\nlimits\n', '## Wed\nderivatives\n', '## Fri\nquiz\n']
+    assert pandoc_cache.convert_texts(days, 'latex') == \
+        ['## MON\nLIMITS\n', '## WED\nDERIVATIVES\n', '## FRI\nQUIZ\n']
+    assert len(pandoc.runs) == 1
+
+    days[1] = '## Wed\nchain rule\n'
+    assert pandoc_cache.convert_texts(days, 'latex')[1] == \
+        '## WED\nCHAIN RULE\n'
+    assert pandoc.runs[1:] == ['## Wed\nchain rule\n']
+
+    pandoc_cache.convert_texts(days, 'latex')
+    assert len(pandoc.runs) == 2
+
+
+def test_one_at_a_time_when_the_break_is_lost(pandoc):
+    pandoc.keep_break = False
+    assert pandoc_cache.convert_texts(['a', 'b'], 'html') == ['A\n', 'B\n']
+    assert pandoc.runs[1:] == ['a', 'b']
+    assert pandoc_cache.convert_text('b', 'html') == 'B\n'
+    assert len(pandoc.runs) == 3
@@ -0,0 +1,83 @@
+import argparse
+import shlex
+import sys
+
+import pytest
+
+import pdf_build
+
+# Copies the .tex file to the .pdf, or fails if it says FAILME.  Each run is
+# logged next to the stub.
+STUB = """\
+import sys
+from os import path
+
+name = sys.argv[1]
+with open(path.join(path.dirname(__file__), 'runs.log'), 'a') as log:
+    log.write(name + '\\n')
+with open(name) as f:
+    tex = f.read()
+if 'FAILME' in tex:
+    print('! Undefined control sequence.')
+    sys.exit(1)
+with open(name[:-len('.tex')] + '.pdf', 'w') as f:
+    f.write(tex)
+"""
+
+
+@pytest.fixture
+def tex(tmp_path):
+    """TeX command running the stub compiler, and a function giving the
+    documents it compiled so far."""
+    stub = tmp_path / 'faketex.py'
+    stub.write_text(STUB)
+    log = tmp_path / 'runs.log'
+
+    def runs():
+        return sorted(log.read_text().split()) if log.exists() else []
+
+    return ' '.join(map(shlex.quote, [sys.executable, str(stub)])), runs
+
+
+def args(command):
+    return argparse.Namespace(tex_command=command, tex_jobs=2)
+
+
+def test_builds_changed_documents_only(tmp_path, tex):
+    command, runs = tex
+    out = tmp_path / 'pdf'
+    docs = {'MATH120-01': 'one', 'MATH120-02': 'two'}
+
+    assert pdf_build.build(docs, str(out), args(command)) == 0
+    assert runs() == ['MATH120-01.tex', 'MATH120-02.tex']
+    assert (out / 'MATH120-02.pdf').read_text() == 'two'
+
+    assert pdf_build.build(docs, str(out), args(command)) == 0
+    assert len(runs()) == 2
+
+    docs['MATH120-02'] = 'two, edited'
+    assert pdf_build.build(docs, str(out), args(command)) == 0
+    assert runs()[2:] == ['MATH120-02.tex']
+    assert (out / 'MATH120-02.pdf').read_text() == 'two, edited'
+
+
+def test_failed_documents_are_counted_and_rebuilt(tmp_path, tex, capsys):
+    command, runs = tex
+    out = tmp_path / 'pdf'
+    docs = {'good': 'fine', 'bad': 'FAILME'}
+
+    assert pdf_build.build(docs, str(out), args(command)) == 1
+    assert 'bad: FAILED (1)' in capsys.readouterr().err
+
+    # A failed document is not recorded, so it is compiled again
+    assert pdf_build.build(docs, str(out), args(command)) == 1
+    assert runs() == ['bad.tex', 'bad.tex', 'good.tex']
+
+
+def test_command_that_cannot_run(tmp_path, capsys):
+    out = tmp_path / 'pdf'
+    failed = pdf_build.build({'doc': 'text'}, str(out),
+                             args(str(tmp_path / 'no-such-tex')))
+    assert failed == 1
+    assert 'doc: FAILED (not run)' in capsys.readouterr().err
+    assert (out / 'doc.tex').read_text() == 'text'
@@ -0,0 +1,80 @@
+"""
+Runs svsu_get_schedule against a saved copy of the course search page,
+served locally, so the clicking and waiting in `click_when_ready` and
+`expand_all_courses` are checked without the real site.  Needs Chrome and
+chromedriver; skipped without them.
+"""
+import shutil
+import subprocess
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from os import path
+
+import pytest
+
+pytest.importorskip("selenium")
+
+HERE = path.dirname(path.abspath(__file__))
+FIXTURES = path.join(HERE, 'fixtures')
+SCRIPT = path.join(HERE, '..', 'canvas_and_schedule', 'svsu_get_schedule')
+
+pytestmark = pytest.mark.skipif(
+    not shutil.which('chromedriver'),
+    reason="needs Chrome and chromedriver")
+
+
+class SearchPage(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path != '/Search':
+            self.send_error(404)
+            return
+        with open(path.join(FIXTURES, 'course_search.html'), 'rb') as f:
+            body = f.read()
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def schedule(*args, instructor='Smith, J'):
+    res = subprocess.run([sys.executable, SCRIPT] +
+                         ([instructor] if instructor else []) +
+                         ['Fall', '2025', '--timeout', '10'] + list(args),
+                         stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                         universal_newlines=True, timeout=120)
+    assert res.returncode == 0, res.stderr
+    return res.stdout
+
+
+@pytest.fixture
+def site():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), SearchPage)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield 'http://127.0.0.1:{}'.format(server.server_port)
+    server.shutdown()
+
+
+def test_search_matches_saved_results(site):
+    searched = schedule('--url', site)
+
+    saved = schedule('--from-html',
+                     path.join(FIXTURES, 'course_search_expanded.html'))
+    assert '\\classA{MATH-120-01}{SE 131}{M,W}{10:30-11:45}' in searched
+    assert searched == saved
+
+
+def test_batch_browsers_run_side_by_side(site, tmp_path):
+    batch = tmp_path / 'instructors'
+    batch.write_text('Smith, J\nJones, A\n')
+    schedule('--url', site, '--batch', str(batch), '--browsers', '2',
+             '--outdir', str(tmp_path), instructor=None)
+
+    assert (tmp_path / 'Smith__J.tex').exists()
+    assert (tmp_path / 'Jones__A.tex').exists()
+    summary = (tmp_path / 'summary.csv').read_text().splitlines()
+    assert len(summary) == 1 + 2 * 2
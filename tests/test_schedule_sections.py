@@ -0,0 +1,28 @@
+from os import path
+
+import bs4
+
+from schedule_sections import extract_sections_from_html, html_text, strip_section
+
+FIXTURES = path.join(path.dirname(__file__), 'fixtures')
+
+
+def test_html_text_breaks_only_at_blocks():
+    cell = bs4.BeautifulSoup(
+        '<td><span>M/W</span> <span>10:30 AM - 11:45 AM</span><br>'
+        '8/25/2025\n - 12/12/2025 <div>Room <b>131</b></div></td>',
+        'lxml').td
+    assert html_text(cell) == ('M/W 10:30 AM - 11:45 AM\n'
+                               '8/25/2025 - 12/12/2025\nRoom 131')
+
+
+def test_sections_from_saved_page():
+    with open(path.join(FIXTURES, 'course_search_expanded.html')) as f:
+        sections = extract_sections_from_html(f.read())
+
+    assert [strip_section(s) for s in sections] == [
+        {'caption': 'MATH-120-01', 'loc': 'Science East 131',
+         'days': ['M', 'W'], 'start': '10:30', 'end': '11:45'},
+        {'caption': 'MATH-161-02', 'loc': 'Pioneer Hall 240',
+         'days': ['T', 'Th'], 'start': '13:30', 'end': '14:45'},
+    ]
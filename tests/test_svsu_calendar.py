@@ -0,0 +1,66 @@
+"""
+Checks the page cache of `svsu_calendar.fetch_page` against a local stand-in
+for the calendar page that supports ETag and If-None-Match.
+"""
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import svsu_calendar
+
+
+class CalendarPage(BaseHTTPRequestHandler):
+    def do_GET(self):
+        server = self.server
+        server.requests.append(self.headers.get('If-None-Match'))
+        etag = '"{}"'.format(server.version)
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+        body = '<html>version {}</html>'.format(server.version).encode()
+        self.send_response(200)
+        self.send_header('ETag', etag)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def page(monkeypatch, tmp_path):
+    monkeypatch.setattr(svsu_calendar, 'CACHEDIR', str(tmp_path))
+    server = ThreadingHTTPServer(('127.0.0.1', 0), CalendarPage)
+    server.version = 1
+    server.requests = []
+    server.url = 'http://127.0.0.1:{}/calendar/'.format(server.server_port)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+
+
+def test_fresh_page_is_not_fetched_again(page):
+    text, digest = svsu_calendar.fetch_page(page.url)
+    assert text == '<html>version 1</html>'
+    assert svsu_calendar.fetch_page(page.url) == (text, digest)
+    assert page.requests == [None]
+
+
+def test_old_page_is_revalidated(page):
+    text, digest = svsu_calendar.fetch_page(page.url)
+
+    # Not changed: 304, and the cached copy is used
+    assert svsu_calendar.fetch_page(page.url, ttl=0) == (text, digest)
+    assert page.requests == [None, '"1"']
+
+    # Changed: downloaded again, with a new digest
+    page.version = 2
+    text2, digest2 = svsu_calendar.fetch_page(page.url, ttl=0)
+    assert text2 == '<html>version 2</html>'
+    assert digest2 != digest
+    assert page.requests == [None, '"1"', '"1"']
+    assert svsu_calendar.fetch_page(page.url) == (text2, digest2)
+    assert len(page.requests) == 3
@@ -0,0 +1,78 @@
+import json
+
+import pytest
+import requests
+
+import canvas_api
+from canvas_server import CanvasServer
+from parse_schedule import sync_events
+
+
+def day(i):
+    return {'title': 'Day {}'.format(i), 'description': '<p>Notes</p>',
+            'start_at': '2025-09-{:02}T10:30:00-04:00'.format(i + 1)}
+
+
+def fail_day_5(method, path, form):
+    if method == 'POST' and form.get('calendar_event[title]') == 'Day 5':
+        return 500
+    return None
+
+
+@pytest.fixture
+def canvas(monkeypatch):
+    def connect(server):
+        monkeypatch.setattr(canvas_api, 'APIURL', server.url)
+        monkeypatch.setenv('CANVAS_TOKEN', 'token')
+    return connect
+
+
+def test_failed_create_keeps_the_others(canvas, tmp_path):
+    record = str(tmp_path / 'events.json')
+    events = {'2025-09-{:02}'.format(i + 1): day(i) for i in range(10)}
+
+    with CanvasServer(fail=fail_day_5) as server:
+        canvas(server)
+        with pytest.warns(UserWarning), pytest.raises(requests.HTTPError):
+            sync_events(7, events, record, jobs=4)
+
+        # The failed POST is not sent again; everything else is recorded
+        assert len(server.events) == 9
+        assert len(server.requests) == 10
+        with open(record) as f:
+            assert len(json.load(f)['7']) == 9
+
+        server.fail = None
+        assert sync_events(7, events, record, jobs=4) == \
+            {'created': 1, 'updated': 0, 'deleted': 0}
+        assert len(server.events) == 10
+
+
+def test_update_and_delete(canvas, tmp_path):
+    record = str(tmp_path / 'events.json')
+    events = {'2025-09-{:02}'.format(i + 1): day(i) for i in range(3)}
+
+    with CanvasServer() as server:
+        canvas(server)
+        sync_events(7, events, record)
+        events['2025-09-01']['title'] = 'Quiz'
+        del events['2025-09-03']
+        assert sync_events(7, events, record) == \
+            {'created': 0, 'updated': 1, 'deleted': 1}
+        assert sync_events(7, events, record) == \
+            {'created': 0, 'updated': 0, 'deleted': 0}
+
+    assert sorted(e['calendar_event[title]'] for e in server.events.values()) \
+        == ['Day 1', 'Quiz']
+
+
+def test_throttled_requests_are_retried(canvas, tmp_path):
+    record = str(tmp_path / 'events.json')
+    events = {'2025-09-{:02}'.format(i + 1): day(i) for i in range(20)}
+
+    with CanvasServer() as server:
+        canvas(server)
+        sync_events(7, events, record, jobs=8)
+
+    assert server.throttled > 0
+    assert len(server.events) == 20